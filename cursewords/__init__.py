@@ -1,3 +1,5 @@
+from collections import namedtuple
+
 def check_box_glyphs():
     import os
     import sys
@@ -19,37 +21,34 @@ def check_box_glyphs():
 
 
 
-class YX(tuple):
-    def __new__(self,y,x):
-        return super(YX,self).__new__(self,(y,x))
-    def __init__(self,y,x):
-        self.y = y
-        self.x = x
+# These are created by the thousand (several per square), so they're slotted
+# namedtuples: no instance __dict__, and the named fields are read straight out
+# of the tuple. repr() stays that of a plain tuple.
+
+class YX(namedtuple('YX', ['y', 'x'])):
+    __slots__ = ()
+    __repr__ = tuple.__repr__
 
 class Coord(YX):
+    __slots__ = ()
     def __add__(self,other):
-        assert isinstance(other,Coord), 'Operand {} is of type {}'.format(str(other),str(type(other)))
-        return Coord(self.y+other.y,self.x+other.x)
+        return tuple.__new__(Coord,(self[0]+other[0],self[1]+other[1]))
     def __radd__(self,other):
-        assert isinstance(other,Coord), 'Operand {} is of type {}'.format(str(other),str(type(other)))
-        return Coord(other.y+self.y,other.x+self.x)
+        return tuple.__new__(Coord,(other[0]+self[0],other[1]+self[1]))
     def __mul__(self,other):
-        return Coord(self.y*other,self.x*other)
+        return tuple.__new__(Coord,(self[0]*other,self[1]*other))
     def __rmul__(self,other):
-        return Coord(self.y*other,self.x*other)
-
-class Directional(tuple):
-    def __new__(self,down=None,across=None):
-        return super(Directional,self).__new__(self,(down,across))
-    def __init__(self,down=None,across=None):
-        self.down = down
-        self.across = across
+        return tuple.__new__(Coord,(self[0]*other,self[1]*other))
+
+class Directional(namedtuple('Directional', ['down', 'across'], defaults=[None, None])):
+    __slots__ = ()
+    __repr__ = tuple.__repr__
     def __getitem__(self,key):
         if isinstance(key,Directional):
-            if key.down:
-                return self.down
-            elif key.across:
-                return self.across
+            if key[0]:
+                return tuple.__getitem__(self,0)
+            elif key[1]:
+                return tuple.__getitem__(self,1)
             else:
                 return None
         else:
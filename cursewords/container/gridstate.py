@@ -0,0 +1,122 @@
+from functools import lru_cache
+
+# Struct-of-arrays storage for a puzzle's squares. Solution, fill and GEXT
+# flags live in one bytearray each (row-major, one byte per square, same
+# layout as the .puz file), with rebus text in side tables keyed by index.
+# Square objects are thin views onto one index of this, so saving, counting
+# and checking can work on whole arrays at a time.
+
+EMPTY = ord('-')
+BLOCK = ord('.')
+
+# GEXT bits, as in the file
+SHADED = 0x80
+GIVEN = 0x40
+BAD = 0x20
+PREV_BAD = 0x10
+GEXT_BITS = SHADED | GIVEN | BAD | PREV_BAD
+
+# not part of the file format: squares locked after a successful check
+LOCKED = 0x01
+
+@lru_cache(maxsize=None)
+def _mask_table(mask):
+    # bytes.translate() table mapping every byte to 1 if any bit of mask is
+    # set in it, 0 otherwise; translate + count then counts flagged squares
+    return bytes(1 if b & mask else 0 for b in range(256))
+
+_NONZERO = _mask_table(0xFF)
+
+# GEXT byte as read -> flag byte
+_FROM_GEXT = bytes(b & GEXT_BITS for b in range(256))
+
+# flag byte -> GEXT byte to write out (a locked square is saved as given)
+_TO_GEXT = bytes((b & GEXT_BITS) | (GIVEN if b & LOCKED else 0) for b in range(256))
+
+class GridState(object):
+
+    def __init__(self, height, width, solution, state):
+
+        self.height = height
+        self.width = width
+
+        self.solution = bytearray(solution.encode('ascii'))
+        self.state = bytearray(state.encode('ascii'))
+        self.flags = bytearray(height * width)
+
+        self.rebus_solution = dict()
+        self.rebus_state = dict()
+
+    def __len__(self):
+        return len(self.solution)
+
+    def index(self, y, x):
+        return y * self.width + x
+
+    def load_GEXT(self, data):
+        # keep only the bits we know about
+        flags = bytes(data[:len(self)]).translate(_FROM_GEXT)
+        self.flags[:len(flags)] = flags
+
+    def load_rebus_state(self, strings):
+
+        for i, text in enumerate(strings[:len(self)]):
+            if text:
+                self.rebus_state[i] = text
+                # the fill byte always holds the first character, like the
+                # file does after a save
+                self.state[i] = ord(text[0])
+
+    def count_blocks(self):
+        return self.solution.count(BLOCK)
+
+    def count_fillable(self):
+        return len(self) - self.count_blocks()
+
+    def count_filled(self):
+        # rebus squares carry their first character in the fill byte, so an
+        # empty square is exactly a '-'
+        return self.count_fillable() - self.state.count(EMPTY)
+
+    def count_flagged(self, mask):
+        return self.flags.translate(_mask_table(mask)).count(1)
+
+    def count_wrong(self):
+
+        # Squares that are filled in and don't match the solution, without a
+        # Python-level loop: XOR the arrays as big integers, so each byte of
+        # the result is nonzero wherever the two differ, squash those bytes
+        # to 0/1 and AND "differs from the solution" with "isn't empty".
+
+        n = len(self)
+        if not n:
+            return 0
+
+        differs = int.from_bytes(self._xor(self.state, self.solution).translate(_NONZERO), 'big')
+        filled = int.from_bytes(self._xor(self.state, bytes([EMPTY]) * n).translate(_NONZERO), 'big')
+
+        return bin(differs & filled).count('1')
+
+    def is_solved(self):
+        # blocks are '.' in both, empty squares never match the solution
+        return self.state == self.solution
+
+    def state_rows(self):
+        state = self.state.decode('ascii')
+        return [state[i:i+self.width] for i in range(0, len(state), self.width)]
+
+    def GEXT(self):
+        return self.flags.translate(_TO_GEXT)
+
+    def RUSR(self, encode):
+
+        strings = [b''] * len(self)
+        for i, text in self.rebus_state.items():
+            strings[i] = encode(text)
+
+        return b'\x00'.join(strings) + b'\x00'
+
+    @staticmethod
+    def _xor(a, b):
+        n = len(a)
+        return (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(n, 'big')
@@ -1,14 +1,17 @@
 import re
 import sys
 import os.path
+from bisect import bisect_left, bisect_right, insort
 from shutil import get_terminal_size
 from textwrap import wrap
 from collections import namedtuple
 
-from cursewords import Coord, Directional
+from cursewords import Directional
+from cursewords.container.gridstate import GridState, GIVEN, BAD, PREV_BAD, BLOCK, EMPTY
 from cursewords.container.square import Square
 from cursewords.container.word import Word
 from cursewords.etc.special_chars import webding_to_unicode, unicode_to_webding
+from cursewords.etc.checksum import checksum_region
 from cursewords.etc.timer import Timer
 
 ACROSS = 0
@@ -38,11 +41,11 @@ class PuzzleBuffer(object):
     ]
 
     file_cksum = BufferItem(0x00, 0x02, b_int)
-    magic = BufferItem(0x02, 0x0C, lambda x: x.decode('ascii'))
+    magic = BufferItem(0x02, 0x0C, lambda x: str(x, 'ascii'))
     CIB_cksum = BufferItem(0x0E, 0x02, b_int)
     masked_low_cksums = BufferItem(0x10, 0x04, list)
     masked_high_cksums = BufferItem(0x14, 0x04, list)
-    version = BufferItem(0x18, 0x04, lambda x: x.decode('ascii'))
+    version = BufferItem(0x18, 0x04, lambda x: str(x, 'ascii'))
     reserved_0x1C = BufferItem(0x1C, 0x02)
     scrambled_cksum = BufferItem(0x1E, 0x02, b_int)
     reserved_0x20 = BufferItem(0x20, 0x0C)
@@ -54,10 +57,13 @@ class PuzzleBuffer(object):
 
     begin_var_data = 0x34
 
+    magic_string = b'ACROSS&DOWN\x00'
+
     def __init__(self):
 
         self._pointer = 0x00
-        self.content = b''
+        self._data = b''
+        self.content = memoryview(self._data)
         self.header_garbage = b''
         self.size = 0
 
@@ -72,28 +78,27 @@ class PuzzleBuffer(object):
 
     def open(self, path):
 
+        # the raw file is kept around as bytes so that string boundaries can
+        # be located with bytes.find(); everything else reads through a
+        # memoryview so that slicing never copies
         with open(path, 'rb') as f:
-            self.content = f.read()
+            self._data = f.read()
 
-        self.size = len(self.content)
+        self.content = memoryview(self._data)
+        self.size = len(self._data)
 
     def prune_garbage(self):
 
-        start = 0x00
+        start = self._data.find(self.magic_string, self.magic.offset) - self.magic.offset
 
-        while True:
-            self.seek(start + 0x02)
-            magic = self.read(0x0C)
-            if magic == b'ACROSS&DOWN\x00':
-                break
-            elif magic == b'':
-                raise FileReadError('Unable to buffer content - format not recognized... why are you doing this to me?')
-            else:
-                start += 1
+        if start < 0:
+            raise FileReadError('Unable to buffer content - format not recognized... why are you doing this to me?')
 
-        self.header_garbage = self.content[:start]
-        self.content = self.content[start:]
-        self.size = len(self.content)
+        if start:
+            self.header_garbage = self._data[:start]
+            self._data = self._data[start:]
+            self.content = memoryview(self._data)
+            self.size = len(self._data)
 
     def load(self, path):
 
@@ -106,24 +111,21 @@ class PuzzleBuffer(object):
         l = w*h
         n = b_int(self.read(2))
 
-        self.solution = BufferItem(self.begin_var_data, l, lambda x: x.decode('ascii'))
-        self.state = BufferItem(self.begin_var_data + l, l, lambda x: x.decode('ascii'))
+        self.solution = BufferItem(self.begin_var_data, l, lambda x: str(x, 'ascii'))
+        self.state = BufferItem(self.begin_var_data + l, l, lambda x: str(x, 'ascii'))
 
         items = []
         offset = self.begin_var_data + 2*l
-        self.seek(offset)
 
         for _ in range(n + 4):
-            length = 0
-            while True:
-                ch = self.read(1)
-                if ch == b'\x00':
-                    break
-                else:
-                    length += 1
-            bufitem = BufferItem(offset, length, lambda x: x.decode('iso-8859-1'))
+            end = self._data.find(b'\x00', offset)
+            if end < 0:
+                raise FileReadError('Unterminated string at offset {}'.format(offset))
+            bufitem = BufferItem(offset, end - offset, lambda x: str(x, 'iso-8859-1'))
             items.append(bufitem)
-            offset += length + 1
+            offset = end + 1
+
+        self.seek(offset)
 
         self.title = items[0]
         self.author = items[1]
@@ -134,16 +136,7 @@ class PuzzleBuffer(object):
         self.etc = BufferItem(offset, self.size - offset)
 
     def checksum_region(self, offset, length, initial_value=0):
-        cksum = initial_value
-        self.seek(offset)
-        for i in range(length):
-                if cksum & 1:
-                        cksum = (cksum >> 1) + 0x8000
-                else:
-                        cksum = cksum >> 1
-                cksum += b_int(self.read(1))
-                cksum &= 0xFFFF
-        return cksum
+        return checksum_region(self.content[offset:offset+length], initial_value)
 
     def seek(self, offset, whence=0):
 
@@ -175,7 +168,8 @@ class PuzzleBuffer(object):
     def clear(self):
 
         self._pointer = 0x00
-        self.content = b''
+        self._data = b''
+        self.content = memoryview(self._data)
         self.size = 0
 
         self.solution = None
@@ -187,7 +181,11 @@ class PuzzleBuffer(object):
         self.notes = None
         self.etc = None
 
-class Puzzle(object):
+class PuzzleHeader(object):
+
+    # Everything stored in the .puz file itself, minus the square/word objects.
+    # Enough to validate a file and fill in a library entry without paying
+    # for a full Puzzle.
 
     low_cksum_masks = [0x49, 0x43, 0x48, 0x45]
     high_cksum_masks = [0x41, 0x54, 0x45, 0x44]
@@ -222,9 +220,6 @@ class Puzzle(object):
         self.notes = None
         self.clues = []
 
-        self.words = Directional(across=[], down=[])
-        self.squares = []
-
         self.fillable = 0
         self.filled = 0
         self.checked = 0
@@ -247,28 +242,41 @@ class Puzzle(object):
         self.parse_file()
         if validate:
             _ = self.validate()
-        self._init_squares()
-        self._init_words()
+        self._init_cells()
 
-        if self.filled == self.fillable:
-            complete = True
-            for row in self.squares:
-                for square in row:
-                    if not square.check(silent=True):
-                        complete = False
-            if complete:
-                self.complete = True
+        if self.filled == self.fillable and not self.cells.count_wrong():
+            self.complete = True
+
+    def _init_cells(self):
+
+        # Loads the grid into a GridState and counts from that, so Puzzle.peek
+        # and a full Puzzle do the same bookkeeping, a whole array at a time
+
+        cells = GridState(self.height, self.width, ''.join(self.solution), ''.join(self.state))
+
+        if 'GEXT' in self.etc:
+            cells.load_GEXT(self.etc['GEXT']['data'])
+
+        if 'GRBS' in self.etc:
+            for yx, key in enumerate(self.etc['GRBS']['data'][:len(cells)]):
+                rebus_solution = self.rebus_dict.get(key, None)
+                if rebus_solution is not None:
+                    cells.rebus_solution[yx] = rebus_solution
+
+        if 'RUSR' in self.etc:
+            cells.load_rebus_state([self._parse_special(text) for text in self.user_rebus])
+
+        self.cells = cells
+
+        self.given += cells.count_flagged(GIVEN)
+        self.bad += cells.count_flagged(BAD)
+        self.prev_bad += cells.count_flagged(PREV_BAD)
+        self.checked += cells.count_flagged(GIVEN | BAD | PREV_BAD)
+        self.fillable += cells.count_fillable()
+        self.filled += cells.count_filled()
 
     def checksum_object(self, obj, initial_value=0):
-        cksum = initial_value
-        for byte in obj:
-                if cksum & 1:
-                        cksum = (cksum >> 1) + 0x8000
-                else:
-                        cksum = cksum >> 1
-                cksum += byte
-                cksum &= 0xFFFF
-        return cksum
+        return checksum_region(obj, initial_value)
 
     def parse_file(self):
 
@@ -295,14 +303,14 @@ class Puzzle(object):
 
         while True:
         
-            heading = buff.read(0x04).decode('ascii')
+            heading = str(buff.read(0x04), 'ascii')
 
             if not heading:
                 break
             else:
                 data_length = b_int(buff.read(0x02))
                 cksum = b_int(buff.read(0x02))
-                data = buff.read(data_length)
+                data = bytes(buff.read(data_length))
                 _ = buff.read(1)
 
                 if len(data) != data_length:
@@ -341,23 +349,23 @@ class Puzzle(object):
         return self.checksum_object(state_bytes, init)
 
     def get_partial_cksum(self, init=0):
-        cksum = init
+        return self.checksum_object(self._get_partial_region(), init)
+
+    def _get_partial_region(self):
+        # the checksum is computed sequentially, so checksumming the strings
+        # back to back is the same as checksumming their concatenation
+        region = []
         if self.title:
-            #cksum = self.buffer.checksum_region(self.buffer.title.offset, self.buffer.title.size + 1, cksum)
-            cksum = self.checksum_object(self.title.encode('iso-8859-1') + b'\x00', cksum)
+            region.append(self.title.encode('iso-8859-1') + b'\x00')
         if self.author:
-            #cksum = self.buffer.checksum_region(self.buffer.author.offset, self.buffer.author.size + 1, cksum)
-            cksum = self.checksum_object(self.author.encode('iso-8859-1') + b'\x00', cksum)
+            region.append(self.author.encode('iso-8859-1') + b'\x00')
         if self.copyright:
-            #cksum = self.buffer.checksum_region(self.buffer.copyright.offset, self.buffer.copyright.size + 1, cksum)
-            cksum = self.checksum_object(self.copyright.encode('iso-8859-1') + b'\x00', cksum)
+            region.append(self.copyright.encode('iso-8859-1') + b'\x00')
         for clue in self.clues:
-            #cksum = self.buffer.checksum_region(clue.offset, clue.size, cksum)
-            cksum = self.checksum_object(clue.encode('iso-8859-1'), cksum)
+            region.append(clue.encode('iso-8859-1'))
         if self.notes and (self.version >= '1.3'):
-            #cksum = self.buffer.checksum_region(self.buffer.notes.offset, self.buffer.notes.size + 1, cksum)
-            cksum = self.checksum_object(self.notes.encode('iso-8859-1') + b'\x00', cksum)
-        return cksum
+            region.append(self.notes.encode('iso-8859-1') + b'\x00')
+        return b''.join(region)
 
     def get_file_cksum(self, init=0):
         cksum = self.get_CIB_cksum(init)
@@ -402,23 +410,86 @@ class Puzzle(object):
 
         return file_cksum_calc, CIB_calc, masked_low_calc, masked_high_calc, etc_cksums
 
+    def _parse_special(self,byte_string):
+        if len(byte_string) == 3 and byte_string[0] == 91 and byte_string[2] == 93:
+            try:
+                result = chr(webding_to_unicode(byte_string[1]))
+            except StopIteration:
+                result = byte_string.decode('ascii')
+        else:
+            return byte_string.decode('ascii')
+
+    def _encode_special(self,string):
+        if not string:
+            return b''
+        if len(string) == 1:
+            try:
+                char_code = webding_to_unicode(ord(string))
+                return b'[' + char_code + b']'
+            except StopIteration:
+                return string.encode('ascii')
+        else:
+            return string.encode('ascii')
+
+class Puzzle(PuzzleHeader):
+
+    def __init__(self, path=None, validate=True):
+
+        self.words = Directional(across=[], down=[])
+        self.words_by_ref = dict()
+        self.squares = []
+        self.cells = None
+        self.nav = dict()
+
+        # filled squares that match the solution, kept up to date by
+        # Square._update; the puzzle is solved when this reaches fillable
+        self.correct = 0
+
+        # navigation order -> square index, and square index -> position in
+        # that order, for across (0, 1) and down (1, 0)
+        self._nav_order = dict()
+        self._nav_rank = dict()
+
+        # positions (in each navigation order) of the empty squares, and
+        # positions (in Word.next order) of the words that still have some,
+        # kept sorted and updated as squares are filled and cleared
+        self._empty = dict()
+        self._word_seq = dict()
+        self._word_list = []
+        self._word_empty = dict()
+        self._incomplete = []
+
+        PuzzleHeader.__init__(self, path=path, validate=validate)
+
+    @staticmethod
+    def peek(path, validate=True):
+        return PuzzleHeader(path, validate=validate)
+
+    def load(self, validate=True):
+
+        self.buffer.load(self.path)
+        self.parse_file()
+        if validate:
+            _ = self.validate()
+        self._init_cells()
+        self._init_squares()
+        self._init_words()
+        self._init_fill_index()
+
+        self.correct = self.filled - self.cells.count_wrong()
+
+        if self.is_solved():
+            self.complete = True
+
+    def is_solved(self):
+        return self.correct == self.fillable
+
     #XXX TO DO: rewrite all of this, it's a mess
     def save(self, path):
 
         data_buffer = bytes()
 
-        updated_state = []
-        for row in self.squares:
-            line = ''
-            for square in row:
-                if square.state is None:
-                    line += '-'
-                elif square.is_block:
-                    line += '.'
-                else:
-                    line += square.state[0]
-            updated_state.append(line)
-        self.state = updated_state
+        self.state = self.cells.state_rows()
 
         updated_file_cksum = self.CIB_cksum
         updated_file_cksum = self.get_solution_cksum(updated_file_cksum)
@@ -434,21 +505,8 @@ class Puzzle(object):
         # self.masked_low_cksums[2] = self.low_cksum_masks[2] ^ (updated_state_cksum & 0xFF)
         # self.masked_high_cksums[2] = self.high_cksum_masks[2] ^ ((updated_state_cksum & 0xFF00) >> 8)
 
-        updated_GEXT = b''
-        updated_RUSR = b''
-
-        for row in self.squares:
-            for square in row:
-
-                shaded = int(square.is_shaded) and 0x80
-                given = int(square.is_given or square.is_locked) and 0x40
-                bad = int(square.is_marked_bad) and 0x20
-                prev_bad = int(square.prev_marked_bad) and 0x10
-                new = shaded | given | bad | prev_bad
-                updated_GEXT += bytes([new])
-
-                rebus_text = self._encode_special(square.rebus_state)
-                updated_RUSR += rebus_text + b'\x00'
+        updated_GEXT = self.cells.GEXT()
+        updated_RUSR = self.cells.RUSR(self._encode_special)
 
         updated_LTIM = '{},1'.format(self.timer.elapsed).encode('ascii')
 
@@ -509,77 +567,172 @@ class Puzzle(object):
         with open(os.path.expanduser(path),'wb') as f:
             f.write(data_buffer)
 
-    def _parse_special(self,byte_string):
-        if len(byte_string) == 3 and byte_string[0] == 91 and byte_string[2] == 93:
-            try:
-                result = chr(webding_to_unicode(byte_string[1]))
-            except StopIteration:
-                result = byte_string.decode('ascii')
-        else:
-            return byte_string.decode('ascii')
-
-    def _encode_special(self,string):
-        if not string:
-            return b''
-        if len(string) == 1:
-            try:
-                char_code = webding_to_unicode(ord(string))
-                return b'[' + char_code + b']'
-            except StopIteration:
-                return string.encode('ascii')
-        else:
-            return string.encode('ascii')
-
     def _init_squares(self):
 
         for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                square = self._load_square_data(y, x)
-                if square.is_given:
-                    self.given += 1
-                if square.is_marked_bad:
-                    self.bad += 1
-                if square.prev_marked_bad:
-                    self.prev_bad += 1
-                if square.is_given or square.is_marked_bad or square.prev_marked_bad:
-                    self.checked += 1
-                if not square.is_block:
-                    self.fillable += 1
-                    if square.state:
-                        self.filled += 1
-                row.append(square)
-            self.squares.append(row)
-
-        for row in self.squares:
-            for square in row:
-                for d in [(0,1),(0,-1),(1,0),(-1,0)]:
-                    (nbr_y, nbr_x), looped = self._next_valid_neighbor(square.coords, Coord(*d))
-                    square.link_neighbor(d, self.squares[nbr_y][nbr_x], looped)
-
-    def _load_square_data(self, y, x):
-        
-        square = Square(y, x, self.state[y][x], self.solution[y][x])
+            self.squares.append([Square(y, x, self.cells) for x in range(self.width)])
 
-        yx = y*self.width + x
+        self._init_navigation()
 
-        if 'GEXT' in self.etc:
+    def _init_navigation(self):
 
-            sq_GEXT = self.etc['GEXT']['data'][yx]
+        # Arrow-key movement walks the grid in reading order (across) or
+        # column order (down), skipping blocks and wrapping from the end of
+        # one row/column to the start of the next, and from the last square
+        # of the grid back to the first. For each direction, nav holds a
+        # (targets, looped) pair of flat lists indexed like GridState:
+        # where one step from each square lands, and whether that step
+        # wrapped past the end of the grid.
 
-            square.is_shaded = sq_GEXT & 0x80
-            square.is_given = sq_GEXT & 0x40
-            square.is_marked_bad = sq_GEXT & 0x20
-            square.prev_marked_bad = sq_GEXT & 0x10
+        n, width = self.height * self.width, self.width
 
-        if 'GRBS' in self.etc:
-            square.rebus_solution = self.rebus_dict.get(self.etc['GRBS']['data'][yx], None)
+        row_major = list(range(n))
+        col_major = [y*width + x for x in range(width) for y in range(self.height)]
 
-        if 'RUSR' in self.etc:
-            state = self._parse_special(self.user_rebus[yx])
-            square.rebus_state = state if state else None
+        orders = {
+            (0, 1): row_major,
+            (1, 0): col_major,
+            (0, -1): row_major[::-1],
+            (-1, 0): col_major[::-1]
+        }
+
+        self.nav = {d: self._sweep_navigation(order) for d, order in orders.items()}
+
+        for axis in [(0, 1), (1, 0)]:
+            order = orders[axis]
+            rank = [0] * n
+            for position, i in enumerate(order):
+                rank[i] = position
+            self._nav_order[axis] = order
+            self._nav_rank[axis] = rank
+
+    def _sweep_navigation(self, order):
+
+        solution = self.cells.solution
+        targets = [None] * len(order)
+        looped = [False] * len(order)
+
+        first_open = next((i for i in order if solution[i] != BLOCK), None)
+        next_open = None
+
+        # walking backwards, next_open is always the closest open square
+        # ahead of i; past the last one, the next step wraps around
+        for i in reversed(order):
+            if next_open is None:
+                targets[i] = first_open
+                looped[i] = True
+            else:
+                targets[i] = next_open
+            if solution[i] != BLOCK:
+                next_open = i
+
+        return targets, looped
+
+    def next_valid(self, square, dy, dx):
+
+        # the open square one step from square in direction (dy, dx), and
+        # whether getting there wrapped around the grid
+
+        targets, looped = self.nav[(dy, dx)]
+        y, x = divmod(targets[square.i], self.width)
+
+        return self.squares[y][x], looped[square.i]
+
+    def _init_fill_index(self):
+
+        state, solution = self.cells.state, self.cells.solution
+        empty = [i for i in range(len(self.cells)) if state[i] == EMPTY and solution[i] != BLOCK]
+
+        for axis, rank in self._nav_rank.items():
+            self._empty[axis] = sorted(rank[i] for i in empty)
+
+        self._word_list = self.words.across + self.words.down
+        self._word_seq = {word: seq for seq, word in enumerate(self._word_list)}
+        self._word_empty = {word: sum(1 for sq in word if not sq.state) for word in self._word_list}
+        self._incomplete = [self._word_seq[word] for word in self._word_list if self._word_empty[word]]
 
-        return square
+    def mark_filled(self, square):
+
+        # called by Square when it goes from empty to filled
+
+        self.filled += 1
+
+        for axis, rank in self._nav_rank.items():
+            positions = self._empty[axis]
+            k = bisect_left(positions, rank[square.i])
+            if k < len(positions) and positions[k] == rank[square.i]:
+                del positions[k]
+
+        for word in square.words:
+            if word is None:
+                continue
+            self._word_empty[word] -= 1
+            if not self._word_empty[word]:
+                k = bisect_left(self._incomplete, self._word_seq[word])
+                del self._incomplete[k]
+
+    def mark_empty(self, square):
+
+        # called by Square when it goes from filled to empty
+
+        self.filled -= 1
+
+        for axis, rank in self._nav_rank.items():
+            insort(self._empty[axis], rank[square.i])
+
+        for word in square.words:
+            if word is None:
+                continue
+            if not self._word_empty[word]:
+                insort(self._incomplete, self._word_seq[word])
+            self._word_empty[word] += 1
+
+    def next_empty(self, square, dy, dx):
+
+        # The first empty square after square, moving in direction (dy, dx)
+        # the same way next_valid() does, and whether that wrapped around
+        # the grid. Returns (None, False) when nothing is empty.
+
+        axis = (abs(dy), abs(dx))
+        positions = self._empty[axis]
+
+        if not positions:
+            return None, False
+
+        start = self._nav_rank[axis][square.i]
+
+        if dy + dx > 0:
+            k = bisect_right(positions, start)
+            looped = k == len(positions)
+            position = positions[0] if looped else positions[k]
+        else:
+            k = bisect_left(positions, start)
+            looped = k == 0
+            position = positions[-1] if looped else positions[k - 1]
+
+        y, x = divmod(self._nav_order[axis][position], self.width)
+
+        return self.squares[y][x], looped
+
+    def next_incomplete_word(self, word, step=1):
+
+        # the next (or, with step=-1, previous) word in Word.next order that
+        # still has an empty square, wrapping around; None if every word is
+        # filled in
+
+        if not self._incomplete:
+            return None
+
+        seq = self._word_seq[word]
+
+        if step > 0:
+            k = bisect_right(self._incomplete, seq)
+            seq = self._incomplete[k % len(self._incomplete)]
+        else:
+            k = bisect_left(self._incomplete, seq)
+            seq = self._incomplete[k - 1]
+
+        return self._word_list[seq]
 
     def _init_words(self):
 
@@ -613,6 +766,13 @@ class Puzzle(object):
         self.words.across[-1].next = self.words.down[0]
         self.words.down[-1].next = self.words.across[0]
 
+        # resolve cross-references once, so highlighting referenced words is
+        # a set lookup at draw time
+        self.words_by_ref = {(wd.n, wd.direction): wd for wd in self.words.across + self.words.down}
+
+        for wd in self.words_by_ref.values():
+            wd.link_refs(self.words_by_ref)
+
     def _get_word_list(self):
 
         # Processes solution and return a list of tuples
@@ -631,39 +791,6 @@ class Puzzle(object):
         words.sort()
         return words
 
-    def _next_valid_neighbor(self, start, direction):
-
-        height, width = self.height, self.width
-
-        old = start
-        current = start + direction
-        do_continue = False
-        looped = False
-
-        while True:
-
-            if not self.is_valid_coord(*current):
-                current = current + Coord(*reversed(direction))
-                current = Coord(*map(lambda a, b: a % b, current, (height, width)))
-                do_continue = True
-            elif self.squares[current.y][current.x].is_block:
-                current = current + direction
-                do_continue = True
-
-            if old == (height - 1, width - 1) and current == (0, 0):
-                looped = True
-            elif current == (height - 1, width - 1) and old == (0, 0):
-                looped = True
-
-            if do_continue:
-                old = current
-                do_continue = False
-                continue
-            else:
-                break
-
-        return current,looped
-
     def is_valid_coord(self,y,x):
 
         if y < 0 or x < 0:
@@ -4,12 +4,35 @@ from string import ascii_letters, digits
 from functools import partialmethod
 from cursewords import Coord, Directional
 from cursewords.core.aware import CWAware, ColorPaletteAware
+from cursewords.container.gridstate import EMPTY, SHADED, GIVEN, BAD, PREV_BAD, LOCKED
 from cursewords.etc.special_chars import BLOCK
 
 ALLOWED_CHARACTERS = ascii_letters + digits + '@#$%&+?'
 
+def _flag(mask):
+
+    # a bool attribute backed by one bit of the square's GridState flags
+
+    def get(self):
+        return bool(self.cells.flags[self.i] & mask)
+
+    def set(self, value):
+        if value:
+            self.cells.flags[self.i] |= mask
+        else:
+            self.cells.flags[self.i] &= ~mask & 0xFF
+
+    return property(get, set)
+
 class Square(CWAware,ColorPaletteAware):
 
+    # fill, flags and rebus text live in the puzzle's GridState (cells), at
+    # index i; the square itself only keeps what never changes
+    __slots__ = (
+        'coords', 'cells', 'i', 'solution', 'is_block',
+        'n', 'words', '_old_state'
+    )
+
     inner_size = Coord(1,3)
     border_size = Coord(1,1)
 
@@ -28,29 +51,26 @@ class Square(CWAware,ColorPaletteAware):
     def link_grid(grid):
         Square.grid = grid
 
-    def __init__(self, y, x, state, solution):
+    def __init__(self, y, x, cells):
 
         self.coords = Coord(y,x)
-        self.solution = solution
-        self._state = None if state == '-' else state
-
-        self.is_block = True if solution == '.' else False
-        self.is_shaded = False
-        self.is_given = False
-        self.is_marked_bad = False
-        self.prev_marked_bad = False
+        self.cells = cells
+        self.i = cells.index(y, x)
 
-        self.rebus_solution = None
-        self.rebus_state = None
+        self.solution = chr(cells.solution[self.i])
+        self.is_block = True if self.solution == '.' else False
 
         self.n = None
         self.words = Directional(across=None,down=None)
-        self.neighbors = dict()
-
-        self.is_locked = self.is_given
 
         self._old_state = self.state
 
+    is_shaded = _flag(SHADED)
+    is_given = _flag(GIVEN)
+    is_marked_bad = _flag(BAD)
+    prev_marked_bad = _flag(PREV_BAD)
+    is_locked = _flag(LOCKED)
+
     def link_word(self,word):
         old_words = self.words
         if word.direction.across:
@@ -58,9 +78,6 @@ class Square(CWAware,ColorPaletteAware):
         else:
             self.words = Directional(across=old_words.across,down=word)
 
-    def link_neighbor(self, direction, neighbor, looped):
-        self.neighbors[direction] = (neighbor, looped)
-
     def edit(self,content=None,op=None):
 
         if self.is_block:
@@ -82,46 +99,61 @@ class Square(CWAware,ColorPaletteAware):
     def _update(self):
 
         if self.state != self._old_state:
-            self.grid.need_redraw = True
+            self.grid.mark_dirty(self.coords)
             if self.is_marked_bad:
                 self.is_marked_bad = False
                 self.prev_marked_bad = True
 
         if self.state and not self._old_state:
-            self.cw.puz.filled += 1
+            self.cw.puz.mark_filled(self)
         elif self._old_state and not self.state:
-            self.cw.puz.filled -= 1
+            self.cw.puz.mark_empty(self)
+
+        self.cw.puz.correct += self._matches(self.state) - self._matches(self._old_state)
 
         self._old_state = self.state
 
+    def _matches(self, state):
+        return bool(state) and state[0] == self.solution
+
     def _set_state(self,value):
         if value:
-            self._state = value[0]
-            if len(value) > 1:
-                self.rebus_state = value
+            self.cells.state[self.i] = ord(value[0])
+            self.rebus_state = value if len(value) > 1 else None
         else:
-            self._state = self.rebus_state = None
+            self.cells.state[self.i] = EMPTY
+            self.rebus_state = None
 
     def _get_state(self):
-        if self.rebus_state:
-            return self.rebus_state
-        else:
-            return self._state
+        rebus_state = self.cells.rebus_state.get(self.i)
+        if rebus_state:
+            return rebus_state
+        state = self.cells.state[self.i]
+        return None if state == EMPTY else chr(state)
 
     state = property(_get_state, _set_state)
 
+    def _set_rebus_state(self, value):
+        if value:
+            self.cells.rebus_state[self.i] = value
+        else:
+            self.cells.rebus_state.pop(self.i, None)
+
+    rebus_state = property(lambda self: self.cells.rebus_state.get(self.i), _set_rebus_state)
+    rebus_solution = property(lambda self: self.cells.rebus_solution.get(self.i))
+
     def check(self,silent=False):
 
         if self.is_block or not self.state:
             return True
         
-        check_ok = self.state[0] == self.solution
+        check_ok = self._matches(self.state)
 
         if not silent:
             self.is_locked = check_ok
             self.is_given = check_ok
             self.is_marked_bad = not check_ok
-            self.grid.need_redraw = True
+            self.grid.mark_dirty(self.coords)
 
         return check_ok
 
@@ -149,11 +181,15 @@ class Square(CWAware,ColorPaletteAware):
         if self.is_block:
             return 0
 
+        # the grid works out which squares are highlighted once per cursor
+        # move, so everything here is a set lookup
+        grid = self.grid
+
         keys = ['square']
 
-        if self in self.cw.current_word():
+        if self.coords in grid.highlighted:
             keys.append('highlighted')
-            if self == self.cw.current_square():
+            if self.coords == grid.current_coords:
                 keys.append('current')
 
         if self.is_shaded:
@@ -165,9 +201,8 @@ class Square(CWAware,ColorPaletteAware):
         elif self.is_locked:
             keys.append('locked')
 
-        if self.cw.current_word().refs is not None:
-            if any((word.n, word.direction) in self.cw.current_word().refs for word in self.words):
-                keys.append('shaded')
+        if self.coords in grid.cross_referenced:
+            keys.append('shaded')
 
         return self.cw.colors.color(*keys)
 
@@ -4,8 +4,16 @@ from cursewords import Coord, Directional
 from cursewords.core.aware import CWAware
 from cursewords.container.square import Square
 
+CROSSREF_RE = re.compile(r'(?P<nums>(\d+-/?,? ?(?: and )?)+)(?P<direction>across|down)', re.IGNORECASE)
+NUMBER_RE = re.compile(r'\d+')
+
 class Word(object):
 
+    __slots__ = (
+        'start', 'direction', 'solution', 'clue', 'n', 'squares', 'next', 'prev',
+        '_coords', '_positions', 'refs', 'ref_words', 'ref_coords'
+    )
+
     def __init__(self, y, x, direction, word, clue, n):
 
         self.start = Coord(y,x)
@@ -18,7 +26,15 @@ class Word(object):
         self.next = None
         self.prev = None
 
+        # membership and position lookups, filled in by link_squares
+        self._coords = frozenset()
+        self._positions = dict()
+
+        # (n, direction) pairs mentioned in the clue, and the words/squares
+        # they point to once the puzzle has resolved them (see link_refs)
         self.refs = self._parse_crossrefs()
+        self.ref_words = frozenset()
+        self.ref_coords = frozenset()
 
     def link_squares(self,squares):
 
@@ -31,15 +47,27 @@ class Word(object):
             self.squares.append(sq)
             sq.link_word(self)
 
+        self._coords = frozenset(sq.coords for sq in self.squares)
+        self._positions = {sq: i for i, sq in enumerate(self.squares)}
+
+    def index(self, square):
+
+        return self._positions[square]
+
+    def link_refs(self, words_by_ref):
+
+        self.ref_words = frozenset(words_by_ref[ref] for ref in self.refs if ref in words_by_ref)
+        self.ref_coords = frozenset(coords for word in self.ref_words for coords in word._coords)
+
     def _parse_crossrefs(self):
-        matches = re.finditer(r'(?P<nums>(\d+-/?,? ?(?: and )?)+)(?P<direction>across|down)',self.clue,re.IGNORECASE)
+        matches = CROSSREF_RE.finditer(self.clue)
         if not matches:
             return None
         else:
             result = []
             for match in matches:
                 direction = Directional(across=True, down=False) if match.group('direction').lower() == 'across' else Directional(across=False, down=True)
-                for n in re.findall(r'\d+', match.group('nums')):
+                for n in NUMBER_RE.findall(match.group('nums')):
                     n = int(n.rstrip('-'))
                     result.append((n, direction))
             return result
@@ -47,16 +75,10 @@ class Word(object):
     def __contains__(self,item):
 
         if isinstance(item,Coord):
-            if any([sq.coords == item for sq in self.squares]):
-                return True
-            else:
-                return False
+            return item in self._coords
 
         elif isinstance(item,Square):
-            if item in self.squares:
-                return True
-            else:
-                return False
+            return item in self._positions
         else:
             return False
 
@@ -20,7 +20,11 @@ class Actions(CWAware):
     #         - calls move_cursor_to
     #         - may call toggle_direction
     #     - move_to_next_empty
-    #         - calls move_to_next_valid
+    #         - calls move_cursor_to
+    #         - may call toggle_direction
+    #     - next_incomplete_word / prev_incomplete_word
+    #         - calls move_cursor_to
+    #         - may call toggle_direction
     # - "edit" actions
     #     - fill_square
     #     - clear_square
@@ -111,7 +115,9 @@ class Actions(CWAware):
 
         if move:
 
-            if square == self.cw.current_word().squares[-1]:
+            word = self.cw.current_word()
+
+            if word.index(square) == len(word) - 1:
                 self.next_word()
             else:
                 dy, dx = map(int,self.cw.ui.solver.direction)
@@ -127,22 +133,35 @@ class Actions(CWAware):
 
     def move_to_next_valid(self, dy, dx):
 
-        new, do_toggle = self.cw.current_square().neighbors[(dy, dx)]
+        new, do_toggle = self.cw.puz.next_valid(self.cw.current_square(), dy, dx)
 
         return self.move_cursor_to(*new.coords,toggle_direction=do_toggle)
 
     def move_to_next_empty(self,dy, dx):
 
-        start = self.cw.current_square()
+        new, do_toggle = self.cw.puz.next_empty(self.cw.current_square(), dy, dx)
 
-        while True:
+        if new is None:
+            return False
 
-            self.move_to_next_valid(dy, dx)
-            current = self.cw.current_square()
-            if not current.get_fill():
-                return True
-            if current == start:
-                return False
+        return self.move_cursor_to(*new.coords,toggle_direction=do_toggle)
+
+    def next_incomplete_word(self, step=1):
+
+        current = self.cw.current_word()
+        new = self.cw.puz.next_incomplete_word(current, step)
+
+        if new is None:
+            return False
+
+        # land on the word's first empty square
+        target = next(sq for sq in new if not sq.state)
+
+        return self.move_cursor_to(*target.coords,toggle_direction=current.direction != new.direction)
+
+    def prev_incomplete_word(self):
+
+        return self.next_incomplete_word(step=-1)
 
     def is_valid_coord(self,y,x):
 
@@ -172,11 +191,7 @@ class Actions(CWAware):
 
         #self.notify('checking...'+str(time()))
 
-        for row in self.cw.puz.squares:
-            for square in row:
-                if not square.check(silent=True):
-                    return False
-        return True
+        return self.cw.puz.correct == self.cw.puz.filled
 
     def exit(self):
         raise SystemExit(0)
\ No newline at end of file
@@ -1,5 +1,7 @@
 class CWAware(object):
 
+    __slots__ = ()
+
     @staticmethod
     def cw_set(cw):
         CWAware.cw = cw
@@ -9,6 +11,8 @@ class CWAware(object):
 
 class ColorPaletteAware(object):
 
+    __slots__ = ()
+
     @staticmethod
     def color_func_set(func):
         ColorPaletteAware.color = func
@@ -1,9 +1,12 @@
 import curses
+import os
+import signal
 from sys import stdout
 
 from cursewords import Directional, Coord
 from cursewords.core.actions import Actions
-from cursewords.core.library import Library
+from cursewords.core.library import Library, LIB_BACKEND
+from cursewords.core.events import EventLoop, Scheduler
 from cursewords.core.aware import ColorPaletteAware
 from cursewords.container.puzzle import Puzzle
 from cursewords.gui.ui import UI
@@ -13,6 +16,9 @@ from cursewords.gui.colors import ColorPalette, default_theme
 
 import time
 
+# how long deferred work may run before the loop checks for input again
+FRAME_BUDGET = 1/60
+
 class CurseWords(Actions):
     
     def __init__(self,win=None,mode='normal'):
@@ -24,6 +30,8 @@ class CurseWords(Actions):
         self.puz = None
         self.win = win
 
+        self.scheduler = Scheduler()
+
         self._init_colors()
 
         self.fillable = 0
@@ -35,10 +43,10 @@ class CurseWords(Actions):
         self.colors = ColorPalette(default_theme)
         ColorPaletteAware.color_func_set(self.colors.color)
 
-    def initialize(self,path=None):
+    def initialize(self,path=None,library_backend=LIB_BACKEND):
 
         self.ui = UI(win=self.win)
-        self.library = Library()
+        self.library = Library(backend=library_backend)
 
         if path:
             self.puz = Puzzle(path=path)
@@ -53,9 +61,47 @@ class CurseWords(Actions):
         
     def loop(self):
 
-        while True:
+        # Sleeps until there's a key, the terminal is resized or something
+        # on a timer (the clock, a status message, a pending library save)
+        # is due, then draws whatever changed. Input always comes first;
+        # deferred work only runs, a frame's worth at a time, when there's
+        # none waiting.
+
+        events = EventLoop()
+        events.add_timer(self.ui.next_update)
+        events.add_timer(self.library.next_flush)
+        events.watch_signal(signal.SIGWINCH)
+
+        self.win.nodelay(True)
+
+        try:
+            while True:
+
+                self.ui.redraw()
+                self.win.refresh()
+
+                has_input, signals = events.wait(poll=bool(self.scheduler))
+
+                if signal.SIGWINCH in signals:
+                    self._resize_terminal()
+
+                if has_input or signals:
+                    self.ui.handle_input()
+                elif self.scheduler:
+                    self.scheduler.run(FRAME_BUDGET, interrupt=events.input_ready)
+
+                self.library.flush()
+        finally:
+            events.close()
+
+    def _resize_terminal(self):
+
+        # Our SIGWINCH handler replaces curses' own, so tell curses about the
+        # new size ourselves; it queues a KEY_RESIZE for handle_input().
+
+        try:
+            size = os.get_terminal_size(stdout.fileno())
+        except OSError:
+            return
 
-            self.win.touchwin()
-            self.ui.redraw()
-            self.win.refresh()
-            self.ui.handle_input()
+        curses.resizeterm(size.lines, size.columns)
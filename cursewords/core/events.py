@@ -0,0 +1,146 @@
+import os
+import sys
+import signal
+import selectors
+
+from collections import OrderedDict
+from time import time
+
+class EventLoop(object):
+
+    # Waits in select() on the terminal until there's a key to read or the
+    # next timer is due, instead of waking up on a fixed interval. Timers are
+    # callables returning the (time()-based) moment they next need the loop
+    # to run, or None if they don't.
+
+    def __init__(self, fd=None):
+
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.timers = []
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.fd, selectors.EVENT_READ, 'input')
+
+        # written to from signal handlers, so a signal ends the wait too
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self.selector.register(self._wakeup_r, selectors.EVENT_READ, 'wakeup')
+
+        self._signals = set()
+
+    def add_timer(self, func):
+
+        self.timers.append(func)
+
+    def watch_signal(self, signum):
+
+        signal.signal(signum, self._on_signal)
+
+    def _on_signal(self, signum, frame):
+
+        self._signals.add(signum)
+
+        try:
+            os.write(self._wakeup_w, b'\x00')
+        except BlockingIOError:
+            pass
+
+    def next_deadline(self):
+
+        deadlines = [deadline for deadline in (timer() for timer in self.timers) if deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    def wait(self, poll=False):
+
+        # Blocks until input, a watched signal or the earliest timer (or just
+        # checks, with poll=True). Returns (has_input, signals received since
+        # the last call).
+
+        if poll:
+            timeout = 0
+        else:
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(deadline - time(), 0)
+
+        has_input = False
+
+        for key, _ in self.selector.select(timeout):
+            if key.data == 'input':
+                has_input = True
+            else:
+                try:
+                    while os.read(self._wakeup_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+
+        signals, self._signals = self._signals, set()
+
+        return has_input, signals
+
+    def input_ready(self):
+
+        return any(key.data == 'input' for key, _ in self.selector.select(0))
+
+    def close(self):
+
+        self.selector.close()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+
+class Scheduler(object):
+
+    # Work that can wait until there's nothing better to do: generators that
+    # do a little at a time and yield in between. The main loop runs them in
+    # short slices when there's no input waiting, so a keypress never sits
+    # behind a long recompute. A component that needs the results sooner
+    # steps its own generator, which the scheduler then picks up from.
+
+    def __init__(self):
+
+        self.jobs = OrderedDict()
+
+    def __bool__(self):
+        return bool(self.jobs)
+
+    def defer(self, owner, job):
+
+        # one job per owner: queuing a new one drops the old one, whose
+        # results are out of date anyway
+
+        self.jobs.pop(owner, None)
+        self.jobs[owner] = job
+
+    def cancel(self, owner):
+
+        self.jobs.pop(owner, None)
+
+    def run(self, budget, interrupt=None):
+
+        # Steps the queued jobs for up to budget seconds, which is split
+        # evenly between them, and stops as soon as interrupt() is true.
+
+        end = time() + budget
+
+        while self.jobs:
+
+            share = (end - time()) / len(self.jobs)
+            if share <= 0:
+                return
+
+            for owner, job in list(self.jobs.items()):
+
+                job_end = time() + share
+
+                while time() < job_end:
+
+                    try:
+                        next(job)
+                    except StopIteration:
+                        if self.jobs.get(owner) is job:
+                            del self.jobs[owner]
+                        break
+
+                    if interrupt is not None and interrupt():
+                        return
@@ -0,0 +1,225 @@
+import re
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+# Library filters are kept as data instead of nested closures. Every predicate
+# can test a single entry, and predicates on indexed fields can also pull the
+# matching keys straight out of an index - an InvertedIndex, or the SQLite
+# store's tables (store.SQLiteIndex) - so most filters end up as a handful of
+# lookups and set operations instead of a scan over the whole library.
+
+# fields that aren't stored directly in the entry dict
+derived_fields = {
+    'complete': lambda entry: entry['status']['complete'],
+    'started': lambda entry: entry['start_date'] is not None,
+}
+
+# field -> values of that field for an entry (several for tags)
+indexed_fields = {
+    'source': lambda entry: [entry['source']],
+    'tags': lambda entry: entry['tags'],
+    'complete': lambda entry: [entry['status']['complete']],
+    'started': lambda entry: [entry['start_date'] is not None],
+}
+
+def get_field(entry, field):
+
+    if field in derived_fields:
+        return derived_fields[field](entry)
+    else:
+        return entry[field]
+
+class InvertedIndex(object):
+
+    def __init__(self):
+
+        self._keys = defaultdict(set)
+        self._values = dict()
+
+    def rebuild(self, lib):
+
+        self._keys = defaultdict(set)
+        self._values = dict()
+
+        for key, entry in lib.items():
+            self.update(key, entry)
+
+    def update(self, key, entry):
+
+        self.remove(key)
+
+        values = [(field, value) for field, func in indexed_fields.items() for value in func(entry)]
+        for item in values:
+            self._keys[item].add(key)
+        self._values[key] = values
+
+    def remove(self, key):
+
+        for item in self._values.pop(key, []):
+            self._keys[item].discard(key)
+
+    def lookup(self, field, value):
+
+        return self._keys.get((field, value), set())
+
+    def values(self, field):
+
+        return [value for (item_field, value), keys in self._keys.items() if item_field == field and keys]
+
+class Predicate(ABC):
+
+    @abstractmethod
+    def test(self, entry):
+        pass
+
+    def is_indexed(self):
+        return False
+
+    def select(self, lib, index):
+        return {key for key, entry in lib.items() if self.test(entry)}
+
+class Equals(Predicate):
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def test(self, entry):
+        return get_field(entry, self.field) == self.value
+
+    def is_indexed(self):
+        return self.field in indexed_fields and self.field != 'tags'
+
+    def select(self, lib, index):
+        if self.is_indexed():
+            return set(index.lookup(self.field, self.value))
+        return Predicate.select(self, lib, index)
+
+class Contains(Predicate):
+
+    def __init__(self, field, value):
+        self.field = field
+        self.value = value
+
+    def test(self, entry):
+        return self.value in get_field(entry, self.field)
+
+    def is_indexed(self):
+        return self.field in indexed_fields
+
+    def select(self, lib, index):
+        if self.is_indexed():
+            return set(index.lookup(self.field, self.value))
+        return Predicate.select(self, lib, index)
+
+class Match(Predicate):
+
+    def __init__(self, field, pattern):
+        self.field = field
+        self.pattern = re.compile(pattern)
+
+    def test(self, entry):
+        value = get_field(entry, self.field)
+        return value is not None and bool(self.pattern.search(value))
+
+    def is_indexed(self):
+        return self.field in indexed_fields and self.field != 'tags'
+
+    def select(self, lib, index):
+        # only the distinct values have to be run through the regex
+        if self.is_indexed():
+            result = set()
+            for value in index.values(self.field):
+                if value is not None and self.pattern.search(value):
+                    result |= index.lookup(self.field, value)
+            return result
+        return Predicate.select(self, lib, index)
+
+class Call(Predicate):
+
+    # escape hatch for arbitrary callables passed in from the console
+
+    def __init__(self, field, func):
+        self.field = field
+        self.func = func
+
+    def test(self, entry):
+        return bool(self.func(get_field(entry, self.field)))
+
+class And(Predicate):
+
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def test(self, entry):
+        return all(predicate.test(entry) for predicate in self.predicates)
+
+    def is_indexed(self):
+        return all(predicate.is_indexed() for predicate in self.predicates)
+
+    def select(self, lib, index):
+
+        # narrow down with whatever the index can answer, then test the rest
+        # of the predicates against the survivors only
+        indexed = [predicate for predicate in self.predicates if predicate.is_indexed()]
+        scanned = [predicate for predicate in self.predicates if not predicate.is_indexed()]
+
+        if not indexed:
+            return Predicate.select(self, lib, index)
+
+        result = indexed[0].select(lib, index)
+        for predicate in indexed[1:]:
+            result &= predicate.select(lib, index)
+
+        return {key for key in result if key in lib and all(predicate.test(lib[key]) for predicate in scanned)}
+
+class Or(Predicate):
+
+    def __init__(self, *predicates):
+        self.predicates = predicates
+
+    def test(self, entry):
+        return any(predicate.test(entry) for predicate in self.predicates)
+
+    def is_indexed(self):
+        return all(predicate.is_indexed() for predicate in self.predicates)
+
+    def select(self, lib, index):
+        result = set()
+        for predicate in self.predicates:
+            result |= predicate.select(lib, index)
+        return result
+
+class Not(Predicate):
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def test(self, entry):
+        return not self.predicate.test(entry)
+
+    def is_indexed(self):
+        return self.predicate.is_indexed()
+
+    def select(self, lib, index):
+        return set(lib.keys()) - self.predicate.select(lib, index)
+
+def compile_filter(**kwargs):
+
+    # Library.filter() keyword arguments -> predicate. Values can be a plain
+    # value to compare against, {'match': pattern} or a callable.
+
+    predicates = []
+
+    for field, value in kwargs.items():
+        if isinstance(value, dict) and 'match' in value:
+            predicates.append(Match(field, value['match']))
+        elif callable(value):
+            predicates.append(Call(field, value))
+        else:
+            predicates.append(Equals(field, value))
+
+    if len(predicates) == 1:
+        return predicates[0]
+    else:
+        return And(*predicates)
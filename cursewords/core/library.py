@@ -1,20 +1,194 @@
 import os
 import shutil
-import json
 import collections.abc
 import datetime
-from re import search
 from time import time
-from indexed import IndexedOrderedDict
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from cursewords.core.aware import CWAware
+from cursewords.core.store import JSONStore, SQLiteStore
+from cursewords.core.filters import InvertedIndex, compile_filter, Equals, Contains, Match, And, Or, Not
 from cursewords.container.puzzle import Puzzle, FileReadError
 
 LIB_DIR=os.path.expanduser(os.path.join('~', '.local', 'share', 'cursewords','library'))
 
+# 'json' keeps everything in libcache.json, 'sqlite' keeps one row per puzzle in
+# libcache.sqlite3 (migrating an existing libcache.json on first run). Chosen
+# with --backend on the command line.
+LIB_BACKENDS=('json', 'sqlite')
+LIB_BACKEND='json'
+
+# seconds a change may sit in memory before flush() writes it out
+SAVE_DELAY=5
+
+# change notifications, see Library.add_listener()
+ADDED = 'added'
+REMOVED = 'removed'
+UPDATED = 'updated'
+REORDERED = 'reordered'
+RESET = 'reset'
+
+def _get_status(puz):
+
+    return {
+        'fillable': puz.fillable,
+        'filled': puz.filled,
+        'checked': puz.checked,
+        'given': puz.given,
+        'bad': puz.bad,
+        'prev_bad': puz.prev_bad,
+        'complete': puz.complete,
+        'timer': puz.timer.elapsed
+    }
+
+def _read_header(path):
+
+    # Runs in worker processes during Library.import_many(), so it has to live
+    # at module level and hand back something picklable rather than the
+    # PuzzleHeader itself
+
+    if not os.path.exists(path):
+        return 1, None
+
+    try:
+        puz = Puzzle.peek(path)
+    except:
+        return 2, None
+
+    return 0, {'title': puz.title, 'author': puz.author, 'status': _get_status(puz)}
+
+class LibraryIndex(dict):
+
+    # dict that keeps its own list of keys in library order, so entries can be
+    # looked up by position (values()[i]) as well as by path, and moved to a
+    # given position - the library keeps itself sorted without resorting
+    # everything. Everything that adds or removes keys goes through the key
+    # list; lookups are left to dict.
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._keys = list(dict.keys(self))
+
+    @classmethod
+    def fromkeys(cls, iterable, value=None):
+        return cls((key, value) for key in iterable)
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._keys.append(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._keys.remove(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __reversed__(self):
+        return reversed(self._keys)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, list(self.items()))
+
+    def __reduce__(self):
+        return self.__class__, (list(self.items()),)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, key, *args):
+        if key in self:
+            self._keys.remove(key)
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        if not self._keys:
+            raise KeyError('popitem(): dictionary is empty')
+        key = self._keys.pop()
+        return key, dict.pop(self, key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        dict.clear(self)
+        self._keys.clear()
+
+    def copy(self):
+        return self.__class__(self)
+
+    def keys(self):
+        return _IndexedKeys(self)
+
+    def values(self):
+        return _IndexedValues(self)
+
+    def items(self):
+        return _IndexedItems(self)
+
+    def sort(self, key=None, reverse=False):
+        self._keys.sort(key=key, reverse=reverse)
+
+    def insert(self, i, key, value):
+        if key in self:
+            raise KeyError(key)
+        dict.__setitem__(self, key, value)
+        self._keys.insert(i, key)
+
+    def index(self, key, *args):
+        return self._keys.index(key, *args)
+
+    def move_index(self, old, new):
+        self._keys.insert(new, self._keys.pop(old))
+
+class _IndexedKeys(collections.abc.KeysView):
+
+    def __getitem__(self, i):
+        return self._mapping._keys[i]
+
+class _IndexedValues(collections.abc.ValuesView):
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._mapping[key] for key in self._mapping._keys[i]]
+        return self._mapping[self._mapping._keys[i]]
+
+class _IndexedItems(collections.abc.ItemsView):
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [(key, self._mapping[key]) for key in self._mapping._keys[i]]
+        key = self._mapping._keys[i]
+        return key, self._mapping[key]
+
+class _Reversed(object):
+
+    # Inverts the ordering of a sort key, so that a single composite key can
+    # mix ascending and descending levels
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
 class Library(CWAware):
 
-    def __init__(self, libdir=LIB_DIR, libfile='libcache.json'):
+    def __init__(self, libdir=LIB_DIR, libfile='libcache.json', backend=LIB_BACKEND):
 
         self.last_touched = 0
 
@@ -27,8 +201,9 @@ class Library(CWAware):
             'author': lambda x: self.lib[x]['author'].strip(),
             'source': lambda x: (self.lib[x]['source'] is None, self.lib[x]['source']),
             'status': self._status_sort,
-            'tags': lambda x: self.lib[x]['tags'],
-            'import_date': lambda x: datetime.datetime.strptime(self.lib[x]['import_date'],'%Y-%m-%d %H:%M:%S')
+            'tags': lambda x: tuple(self.lib[x]['tags']),
+            # 'YYYY-MM-DD HH:MM:SS' already sorts chronologically as a string
+            'import_date': lambda x: self.lib[x]['import_date']
         }
 
         self.sort_by = ['import_date','status','title','source']
@@ -41,81 +216,206 @@ class Library(CWAware):
         if not os.path.exists(LIB_DIR):
             os.makedirs(LIB_DIR)
 
-        try:
-            with open(self.libcache, 'r') as f:
-                try:
-                    self.lib = json.load(f, object_pairs_hook=IndexedOrderedDict)
-                except json.decoder.JSONDecodeError:
-                    raise FileNotFoundError
-        except FileNotFoundError:
-            self.lib = IndexedOrderedDict()
+        if backend == 'sqlite':
+            self.store = SQLiteStore(os.path.splitext(self.libcache)[0] + '.sqlite3', legacy_path=self.libcache)
+        elif backend == 'json':
+            self.store = JSONStore(self.libcache)
+        else:
+            raise ValueError('Unknown library backend: {}'.format(backend))
+
+        self.lib = LibraryIndex(self.store.load())
 
+        # per-field sort keys of every entry, computed once on load and then
+        # again only when that entry changes
+        self._field_keys = dict()
+
+        # composite sort key of every entry, by path and in library order
+        self._sort_keys = dict()
+        self._ordered_sort_keys = []
+
+        # pending writes: keys of changed entries, or everything
+        self._dirty = set()
+        self._dirty_all = False
+        self._dirty_since = None
+
+        # per-entry change counters, see version()
+        self._versions = dict()
+        self._generation = 0
+
+        self._listeners = []
+
+        # the SQLite store answers indexed filter lookups from its tables;
+        # otherwise they come from an index kept in memory
         self._filter = None
+        self._store_index = self.store.filter_index()
+        self._filter_index = self._store_index if self._store_index is not None else InvertedIndex()
         self.filtered_lib = self.lib
 
-        self.touch()
+        self.touch(save=False)
 
-    def touch(self): # ;)
+    def touch(self, *keys, save=True, resort=True): # ;)
+
+        # keys: entries that changed - only those are marked for saving and
+        # moved to their new place in the sort order. With no keys anything
+        # may have changed, so the whole library is resorted (unless
+        # resort=False, e.g. for filter changes) and marked for saving (unless
+        # save=False). Nothing is written here; see flush().
 
         self.last_touched = time()
-        self.resort()
-        self.refilter()
-        self.save_lib()
+        if keys:
+            listed = {key: key in self._sort_keys and key in self.filtered_lib for key in keys}
+            moved = dict()
+            self._mark_dirty(*keys)
+            # new entries sit at the end of self.lib until they're placed;
+            # several at once are cheaper (and simpler) to place by resorting
+            bulk = sum(key not in self._sort_keys for key in keys) > 1
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._field_keys[key] = self._get_field_keys(key)
+                self._filter_index.update(key, self.lib[key])
+                moved[key] = True if bulk else self._reposition(key)
+            if bulk:
+                # the resort may have moved anything
+                self.resort()
+                self.refilter()
+            else:
+                self._refilter_keys(keys, moved)
+        else:
+            if save or resort:
+                self._generation += 1
+            if save:
+                self._mark_dirty()
+            if resort:
+                self._field_keys = dict()
+                self._filter_index.rebuild(self.lib)
+                self.resort()
+            self.refilter()
+
+        if keys:
+            for key in keys:
+                was_listed, is_listed = listed[key], key in self.filtered_lib
+                if is_listed and not was_listed:
+                    self._notify(ADDED, key)
+                elif was_listed and not is_listed:
+                    self._notify(REMOVED, key)
+                elif is_listed:
+                    self._notify(UPDATED, key)
+                    if moved[key]:
+                        self._notify(REORDERED, key)
+        else:
+            self._notify(RESET)
+
+    def add_listener(self, func):
+
+        # func(kind, key) is called after every change to what list_items()
+        # shows: an entry ADDED to it, REMOVED from it (including by the
+        # filter, after it changed), UPDATED in place or REORDERED (after an
+        # UPDATED), or a RESET (key None) when the whole list may be
+        # different - filtering, sorting, or a touch() without keys.
+
+        self._listeners.append(func)
+
+    def _notify(self, kind, key=None):
+
+        for func in self._listeners:
+            func(kind, key)
+
+    def version(self, key):
+
+        # Changes whenever the entry may have: when it's touched by key, or
+        # on a touch() that could have changed anything. Filtering and
+        # sorting leave it alone.
+
+        return self._generation, self._versions.get(key, 0)
 
     def filter(self, refine=False, expand=False, negate=False, **kwargs):
 
         if not kwargs:
             self._filter = None
-            self.touch()
+            self.touch(save=False, resort=False)
             return
 
-        def match(pattern):
-            return lambda x: bool(search(pattern, x))
-
-        def filter_func(item):
-            for key in kwargs:
-                    val = kwargs[key]
-                    if isinstance(val,dict) and 'match' in val:
-                        val = match(val['match'])
-                    if hasattr(val, '__call__'):
-                            if not val(item[key]):
-                                    return False
-                    else:
-                            if item[key] != kwargs[key]:
-                                    return False
-            return True
-
-        old_filter = self._filter
+        self._apply_filter(compile_filter(**kwargs), refine=refine, expand=expand, negate=negate)
+
+    def _apply_filter(self, predicate, refine=False, expand=False, negate=False):
+
         if negate:
-            new_filter = lambda x: not filter_func(x)
-        else:
-            new_filter = filter_func
-
-        if refine:
-            old_filter = self._filter
-            self._filter = lambda x: new_filter(x) and old_filter(x)
-        elif expand:
-            old_filter = self._filter
-            self._filter = lambda x: new_filter(x) or old_filter(x)
+            predicate = Not(predicate)
+
+        if refine and self._filter is not None:
+            self._filter = And(self._filter, predicate)
+            # everything that passes already passed the old filter, so only
+            # what's currently shown has to be looked at
+            selected = self._select(predicate, self.filtered_lib)
+            self.filtered_lib = LibraryIndex((key, val) for key, val in self.filtered_lib.items() if key in selected)
+            self.last_touched = time()
+            self._reset_cursor()
+            self._notify(RESET)
+            return
+        elif expand and self._filter is not None:
+            self._filter = Or(self._filter, predicate)
         else:
-            self._filter = new_filter
+            self._filter = predicate
 
-        self.touch()
+        self.touch(save=False, resort=False)
 
     def refilter(self):
 
-        if self.cw.inited and self.cw.ui.inited:
-            self.cw.ui.browser.interior.cursor = 0
+        self._reset_cursor()
 
         if self._filter is None:
             self.filtered_lib = self.lib
             return
 
-        self.filtered_lib = IndexedOrderedDict()
+        selected = self._select(self._filter, self.lib)
+
+        self.filtered_lib = LibraryIndex()
         for key, val in self.lib.items():
-            if self._filter(val):
+            if key in selected:
                 self.filtered_lib[key] = val
 
+    def _select(self, predicate, lib):
+
+        # the store's index only knows what's been written out
+        if self._store_index is not None:
+            self.flush(force=True)
+
+        return predicate.select(lib, self._filter_index)
+
+    def _refilter_keys(self, keys, moved):
+
+        # Same as refilter(), but only the touched entries are tested against
+        # the filter, and added to, dropped from or moved within filtered_lib.
+        # moved[key] says whether _reposition() moved the entry in self.lib;
+        # one that's placed anew goes after any equal sort keys, the same as
+        # _reposition() does.
+
+        self._reset_cursor()
+
+        if self._filter is None:
+            return
+
+        for key in keys:
+
+            entry = self.lib[key]
+            listed = key in self.filtered_lib
+
+            if not self._filter.test(entry):
+                if listed:
+                    del self.filtered_lib[key]
+            elif listed and not moved[key]:
+                self.filtered_lib[key] = entry
+            else:
+                if listed:
+                    del self.filtered_lib[key]
+                i = bisect_right(self.filtered_lib.keys(), self._sort_keys[key], key=self._sort_keys.__getitem__)
+                self.filtered_lib.insert(i, key, entry)
+
+    def _reset_cursor(self):
+
+        if self.cw.inited and self.cw.ui.inited:
+            self.cw.ui.browser.interior.cursor = 0
+
     # filter shortcuts for convenience
     def clear_filter(self):
         self.filter()
@@ -127,16 +427,19 @@ class Library(CWAware):
         self.filter(expand=True, **kwargs)
 
     def filter_completed(self, refine=False, expand=False, negate=False):
-        self.filter(status=lambda x: x['complete'], refine=refine, expand=expand, negate=negate)
+        self._apply_filter(Equals('complete', True), refine=refine, expand=expand, negate=negate)
 
     def filter_in_progress(self, refine=False, expand=False, negate=False):
-        self.filter(start_date=lambda x: x is not None, status=lambda x: not x['complete'], refine=refine, expand=expand, negate=negate)
+        self._apply_filter(And(Equals('started', True), Equals('complete', False)), refine=refine, expand=expand, negate=negate)
 
     def filter_by_source(self, source, refine=False, expand=False, negate=False):
-        self.filter(source={'match': source}, refine=refine, expand=expand, negate=negate)
+        self._apply_filter(Match('source', source), refine=refine, expand=expand, negate=negate)
+
+    def filter_by_tag(self, tag, refine=False, expand=False, negate=False):
+        self._apply_filter(Contains('tags', tag), refine=refine, expand=expand, negate=negate)
 
     def filter_new(self, refine=False, expand=False, negate=False):
-        self.filter(start_date=None, refine=refine, expand=expand, negate=negate)
+        self._apply_filter(Equals('started', False), refine=refine, expand=expand, negate=negate)
 
     def sort(self, *keys, reverse=dict()):
 
@@ -147,102 +450,223 @@ class Library(CWAware):
             self.sort_by = keys
             for key in reverse:
                 self.sort_reverse[key] = reverse[key]
-            self.touch()
+            self.resort()
+            self.touch(save=False, resort=False)
 
     def resort(self):
 
-        for key in reversed(self.sort_by):
-            # func = lambda x: self.sort_funcs[key](x)
-            self.lib.sort(key=self.sort_funcs[key], reverse=self.sort_reverse[key])
+        for key in self.lib:
+            if key not in self._field_keys:
+                self._field_keys[key] = self._get_field_keys(key)
+
+        self._sort_keys = {key: self._sort_key(key) for key in self.lib}
+
+        self.lib.sort(key=self._sort_keys.__getitem__)
+
+        self._ordered_sort_keys = [self._sort_keys[key] for key in self.lib]
+
+    def _get_field_keys(self, key):
+
+        return {field: func(key) for field, func in self.sort_funcs.items()}
+
+    def _sort_key(self, key):
+
+        field_keys = self._field_keys[key]
+
+        return tuple(
+            _Reversed(field_keys[field]) if self.sort_reverse[field] else field_keys[field]
+            for field in self.sort_by
+        )
+
+    def _reposition(self, key):
+
+        # Moves a new or changed entry to where a full resort would put it.
+        # A new entry has been appended to self.lib, but not necessarily
+        # last, so it's looked up like any other.
+
+        old_sort_key = self._sort_keys.get(key)
+
+        if old_sort_key is None:
+            old = self.lib.index(key)
+        else:
+            lo = bisect_left(self._ordered_sort_keys, old_sort_key)
+            hi = bisect_right(self._ordered_sort_keys, old_sort_key)
+            try:
+                old = self.lib.index(key, lo, hi)
+            except ValueError:
+                old = self.lib.index(key)
+            del self._ordered_sort_keys[old]
+
+        new_sort_key = self._sort_key(key)
+        new = bisect_right(self._ordered_sort_keys, new_sort_key)
+
+        self._ordered_sort_keys.insert(new, new_sort_key)
+        self._sort_keys[key] = new_sort_key
+        self.lib.move_index(old, new)
+
+        return old != new
+
+    def _mark_dirty(self, *keys):
+
+        if keys:
+            self._dirty.update(keys)
+        else:
+            self._dirty_all = True
+
+        if self._dirty_since is None:
+            self._dirty_since = time()
+
+    def next_flush(self):
+        # when flush() will next have something to write, or None
+        if self._dirty_since is None:
+            return None
+        return self._dirty_since + SAVE_DELAY
+
+    def flush(self, force=False):
+
+        # Writes out whatever touch() marked as changed, once the oldest
+        # change is SAVE_DELAY seconds old (or right away with force=True),
+        # so a burst of edits costs a single write. Called from the main loop.
+
+        if self._dirty_since is None:
+            return
+
+        if not force and time() - self._dirty_since < SAVE_DELAY:
+            return
+
+        if self._dirty_all:
+            self.store.save(self.lib)
+        else:
+            self.store.save_entries(self.lib, [key for key in self._dirty if key in self.lib])
+
+        self._dirty = set()
+        self._dirty_all = False
+        self._dirty_since = None
 
     def save_lib(self):
 
-        with open(self.libcache, 'w') as f:
-            json.dump(self.lib, f)
+        # every change goes through touch(), so writing out what's pending
+        # is all there is to do
+        self.flush(force=True)
 
     def import_file(self, path, source=None):
 
         path = os.path.expanduser(path)
 
-        if not os.path.exists(path):
-            return 1
+        ret, header = _read_header(path)
+        if ret != 0:
+            return ret
 
-        try:
-            puz = Puzzle(path)
-        except:
-            return 2
+        ret, target = self._copy_to_library(path)
+        if ret != 0:
+            return ret
+
+        self.lib[target] = self._new_entry(target, header, source)
+
+        self.touch(target)
+
+        return 0
+
+    def import_many(self, paths, source=None, max_workers=None):
+
+        # Same as calling import_file() on each path, but files are parsed and
+        # validated in a process pool, copied from a thread pool, and the
+        # library is only resorted/refiltered/saved once at the end. Returns
+        # the import_file() return code for each path, in order.
+
+        paths = [os.path.expanduser(path) for path in paths]
+
+        if len(paths) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                headers = list(executor.map(_read_header, paths, chunksize=8))
+        else:
+            headers = list(map(_read_header, paths))
+
+        results = [ret for ret, _ in headers]
+
+        # two files with the same name would race for the same target, so
+        # weed those out before copying anything
+        to_copy = []
+        targets = set()
+        for i, path in enumerate(paths):
+            if results[i] != 0:
+                continue
+            target = os.path.join(self.libdir, os.path.basename(path))
+            if target in targets:
+                results[i] = 3
+            else:
+                targets.add(target)
+                to_copy.append(i)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            copied = list(executor.map(self._copy_to_library, [paths[i] for i in to_copy]))
+
+        import_date = datetime.datetime.now().isoformat(sep=' ')[:19]
+
+        imported = []
+
+        for i, (ret, target) in zip(to_copy, copied):
+            results[i] = ret
+            if ret == 0:
+                _, header = headers[i]
+                self.lib[target] = self._new_entry(target, header, source, import_date=import_date)
+                imported.append(target)
+
+        if imported:
+            self.touch(*imported)
+
+        return results
+
+    def _copy_to_library(self, path):
 
         filename = os.path.basename(path)
         target = os.path.join(self.libdir, filename)
 
         if os.path.exists(target):
-            return 3
+            return 3, target
 
         try:
             shutil.copy2(path, target)
         except:
-            return 4
+            return 4, target
 
-        if os.path.exists(target):
+        if not os.path.exists(target):
+            return -1, target
 
-            key = target
+        return 0, target
 
-            title = puz.title
-            author = puz.author
+    def _new_entry(self, target, header, source, import_date=None):
 
-            fillable = puz.fillable
-            filled = puz.filled
-            checked = puz.checked
-            given = puz.given
-            bad = puz.bad
-            prev_bad = puz.prev_bad
-            complete = puz.complete
-            timer = puz.timer.elapsed
+        status = header['status']
 
+        if import_date is None:
             import_date = datetime.datetime.now().isoformat(sep=' ')[:19]
 
-            if complete:
-                completion_date = import_date
-            else:
-                completion_date = None
+        if status['complete']:
+            completion_date = import_date
+        else:
+            completion_date = None
 
-            if filled != 0 or timer != 0:
-                start_date = import_date
-                in_progress = True
-            else:
-                start_date = None
-                in_progress = False
-
-            tags = []
-
-            new_entry = {
-                'path': target,
-                'title': title,
-                'author': author,
-                'status': {
-                    'fillable': fillable,
-                    'filled': filled,
-                    'checked': checked,
-                    'given': given,
-                    'bad': bad,
-                    'prev_bad': prev_bad,
-                    'complete': complete,
-                    'timer': timer
-                },
-                'source': source,
-                'tags': tags,
-                'import_date': import_date,
-                'start_date': start_date,
-                'completion_date': completion_date
-            }
-
-            self.lib[key] = new_entry
-
-            self.touch()
-
-            return 0
-
-        return -1
+        if status['filled'] != 0 or status['timer'] != 0:
+            start_date = import_date
+        else:
+            start_date = None
+
+        tags = []
+
+        new_entry = {
+            'path': target,
+            'title': header['title'],
+            'author': header['author'],
+            'status': status,
+            'source': source,
+            'tags': tags,
+            'import_date': import_date,
+            'start_date': start_date,
+            'completion_date': completion_date
+        }
+
+        return new_entry
 
     def open_file(self, key):
 
@@ -256,20 +680,9 @@ class Library(CWAware):
 
     def update_status(self, puz):
 
-        status = {
-            'fillable': puz.fillable,
-            'filled': puz.filled,
-            'checked': puz.checked,
-            'given': puz.given,
-            'bad': puz.bad,
-            'prev_bad': puz.prev_bad,
-            'complete': puz.complete,
-            'timer': puz.timer.elapsed
-        }
-
-        self[puz]['status'] = status
+        self[puz]['status'] = _get_status(puz)
 
-        self.touch()
+        self.touch(puz.path)
 
     def tag_file(self, key, tag=None, append=False):
 
@@ -278,7 +691,7 @@ class Library(CWAware):
         else:
             self[key]['tags'] = [tag] if tag is not None else []
 
-        self.touch()
+        self.touch(self[key]['path'])
 
     def set_source(self, *args):
 
@@ -291,7 +704,7 @@ class Library(CWAware):
             raise TypeError
             
         self[key]['source'] = source
-        self.touch()
+        self.touch(self[key]['path'])
 
     def list_items(self):
         return self.filtered_lib.values()
@@ -0,0 +1,274 @@
+import os
+import json
+import stat
+import sqlite3
+import tempfile
+
+# Persistence backends for the library. Both hand back the whole library as a
+# plain (insertion-ordered) dict keyed by path; the SQLite one can also write
+# single entries and answer the filter engine's indexed lookups from its
+# tables (see SQLiteIndex). Sorting always happens in memory, in
+# Library.resort(): repositioning a changed entry needs every sort key in
+# memory anyway, and SQL collation can't reproduce keys like title_alt.
+
+ENTRY_FIELDS = ['path', 'title', 'author', 'source', 'tags', 'import_date', 'start_date', 'completion_date']
+STATUS_FIELDS = ['fillable', 'filled', 'checked', 'given', 'bad', 'prev_bad', 'complete', 'timer']
+
+class JSONStore(object):
+
+    # libcache.json holds {"version": 2, "entries": [...]}, one flat list per
+    # entry: the ENTRY_FIELDS values, then a list of the STATUS_FIELDS values,
+    # then (only if there are any) a dict of extra keys. That loads with plain
+    # json.load() - no per-object hook - and is a lot smaller on disk. Old
+    # caches (a dict of path -> entry) are still read.
+
+    version = 2
+
+    def __init__(self, path):
+
+        self.path = path
+
+    def load(self):
+
+        try:
+            with open(self.path, 'r') as f:
+                try:
+                    data = json.load(f)
+                except json.decoder.JSONDecodeError:
+                    raise FileNotFoundError
+        except FileNotFoundError:
+            return dict()
+
+        if data.get('version') == self.version:
+            return {row[0]: self._row_to_entry(row) for row in data['entries']}
+        else:
+            return data
+
+    def save(self, lib):
+
+        # write next to the real file and rename over it, so a crash halfway
+        # through never leaves a truncated libcache.json behind
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.libcache.', suffix='.tmp')
+
+        try:
+            # mkstemp() creates the file 0600; give it the mode the old file
+            # had, or what open() would have given a new one
+            os.chmod(fd, self._file_mode())
+            with os.fdopen(fd, 'w') as f:
+                data = {'version': self.version, 'entries': [self._entry_to_row(entry) for entry in lib.values()]}
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _file_mode(self):
+
+        try:
+            return stat.S_IMODE(os.stat(self.path).st_mode)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def save_entries(self, lib, keys):
+
+        # everything lives in one file, so there's nothing finer-grained to do
+        self.save(lib)
+
+    def filter_index(self):
+
+        # nothing to query; the library keeps its filter index in memory
+        return None
+
+    def _entry_to_row(self, entry):
+
+        row = [entry[field] for field in ENTRY_FIELDS]
+        row.append([entry['status'][field] for field in STATUS_FIELDS])
+
+        if len(entry) > len(ENTRY_FIELDS) + 1:
+            row.append({key: val for key, val in entry.items() if key != 'status' and key not in ENTRY_FIELDS})
+
+        return row
+
+    def _row_to_entry(self, row):
+
+        n = len(ENTRY_FIELDS)
+
+        entry = dict(zip(ENTRY_FIELDS, row[:n]))
+        entry['status'] = dict(zip(STATUS_FIELDS, row[n]))
+
+        if len(row) > n + 1:
+            entry.update(row[n + 1])
+
+        return entry
+
+class SQLiteStore(object):
+
+    entry_fields = ENTRY_FIELDS
+    status_fields = STATUS_FIELDS
+
+    schema = '''
+        CREATE TABLE IF NOT EXISTS puzzles (
+            path TEXT PRIMARY KEY,
+            title TEXT,
+            author TEXT,
+            source TEXT,
+            tags TEXT,
+            import_date TEXT,
+            start_date TEXT,
+            completion_date TEXT,
+            fillable INTEGER,
+            filled INTEGER,
+            checked INTEGER,
+            given INTEGER,
+            bad INTEGER,
+            prev_bad INTEGER,
+            complete INTEGER,
+            timer INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS tags (
+            path TEXT,
+            tag TEXT
+        );
+        CREATE INDEX IF NOT EXISTS puzzles_source ON puzzles (source);
+        CREATE INDEX IF NOT EXISTS puzzles_complete ON puzzles (complete);
+        CREATE INDEX IF NOT EXISTS puzzles_started ON puzzles ((start_date IS NOT NULL));
+        CREATE INDEX IF NOT EXISTS tags_path ON tags (path);
+        CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag);
+    '''
+
+    # PRAGMA user_version; databases from before the tags table are 0
+    schema_version = 1
+
+    _insert_tag = 'INSERT INTO tags (path, tag) VALUES (?, ?)'
+
+    def __init__(self, path, legacy_path=None):
+
+        self.path = path
+        self.legacy_path = legacy_path
+
+        self.db = sqlite3.connect(path)
+        self.db.executescript(self.schema)
+
+        if self.db.execute('PRAGMA user_version').fetchone()[0] < self.schema_version:
+            with self.db:
+                rows = self.db.execute('SELECT path, tags FROM puzzles').fetchall()
+                self.db.execute('DELETE FROM tags')
+                self.db.executemany(self._insert_tag, [(path, tag) for path, tags in rows for tag in json.loads(tags)])
+                self.db.execute('PRAGMA user_version = {}'.format(self.schema_version))
+
+        columns = self.entry_fields + self.status_fields
+        self._select = 'SELECT {} FROM puzzles ORDER BY rowid'.format(', '.join(columns))
+        self._upsert = 'INSERT INTO puzzles ({}) VALUES ({}) ON CONFLICT (path) DO UPDATE SET {}'.format(
+            ', '.join(columns),
+            ', '.join('?' for _ in columns),
+            ', '.join('{0} = excluded.{0}'.format(column) for column in columns[1:])
+        )
+
+    def load(self):
+
+        lib = dict()
+
+        for row in self.db.execute(self._select):
+            lib[row[0]] = self._row_to_entry(row)
+
+        # first run against an existing libcache.json - bring it over, then
+        # move it out of the way so it isn't brought over again if the
+        # database is ever emptied (it's kept, renamed, just in case)
+        if not lib and self.legacy_path is not None:
+            lib = JSONStore(self.legacy_path).load()
+            if lib:
+                self.save(lib)
+                os.replace(self.legacy_path, self.legacy_path + '.migrated')
+
+        return lib
+
+    def save(self, lib):
+
+        removed = [(path,) for path, in self.db.execute('SELECT path FROM puzzles') if path not in lib]
+
+        with self.db:
+            self.db.executemany('DELETE FROM puzzles WHERE path = ?', removed)
+            self.db.executemany(self._upsert, map(self._entry_to_row, lib.values()))
+            self.db.execute('DELETE FROM tags')
+            self.db.executemany(self._insert_tag, [(entry['path'], tag) for entry in lib.values() for tag in entry['tags']])
+
+    def save_entries(self, lib, keys):
+
+        entries = [lib[key] for key in keys]
+
+        with self.db:
+            self.db.executemany(self._upsert, map(self._entry_to_row, entries))
+            self.db.executemany('DELETE FROM tags WHERE path = ?', [(entry['path'],) for entry in entries])
+            self.db.executemany(self._insert_tag, [(entry['path'], tag) for entry in entries for tag in entry['tags']])
+
+    def filter_index(self):
+
+        return SQLiteIndex(self.db)
+
+    def _entry_to_row(self, entry):
+
+        row = [entry[field] for field in self.entry_fields]
+        row[self.entry_fields.index('tags')] = json.dumps(entry['tags'])
+        row += [entry['status'][field] for field in self.status_fields]
+
+        return row
+
+    def _row_to_entry(self, row):
+
+        n = len(self.entry_fields)
+
+        entry = dict(zip(self.entry_fields, row[:n]))
+        entry['tags'] = json.loads(entry['tags'])
+        entry['status'] = dict(zip(self.status_fields, row[n:]))
+        entry['status']['complete'] = bool(entry['status']['complete'])
+
+        return entry
+
+class SQLiteIndex(object):
+
+    # Stands in for filters.InvertedIndex with the SQLite backend: lookups on
+    # the indexed fields are queries against the indexed columns and the tags
+    # table. It only sees what has been written, so the library flushes
+    # pending changes before filtering, and there's nothing to keep up to
+    # date here.
+
+    # filters.indexed_fields (other than tags) -> column or expression, as in
+    # the schema's indexes
+    columns = {
+        'source': 'source',
+        'complete': 'complete',
+        'started': '(start_date IS NOT NULL)',
+    }
+
+    def __init__(self, db):
+
+        self.db = db
+
+    def rebuild(self, lib):
+        pass
+
+    def update(self, key, entry):
+        pass
+
+    def remove(self, key):
+        pass
+
+    def lookup(self, field, value):
+
+        if field == 'tags':
+            query = 'SELECT path FROM tags WHERE tag = ?'
+        else:
+            query = 'SELECT path FROM puzzles WHERE {} IS ?'.format(self.columns[field])
+
+        return {path for path, in self.db.execute(query, (value,))}
+
+    def values(self, field):
+
+        if field == 'tags':
+            query = 'SELECT DISTINCT tag FROM tags'
+        else:
+            query = 'SELECT DISTINCT {} FROM puzzles'.format(self.columns[field])
+
+        return [value for value, in self.db.execute(query)]
@@ -55,6 +55,14 @@ class Timer(object):
         else:
             return self._elapsed + int(time()) - self._time_at_start
 
+    def next_tick(self):
+        # elapsed counts whole seconds of time(), so the display only changes
+        # on the next second boundary
+        if not self.running:
+            return None
+        else:
+            return int(time()) + 1
+
     def fmt_time(self):
         hours, minutes = divmod(self.elapsed, 3600)
         minutes, seconds = divmod(minutes, 60)
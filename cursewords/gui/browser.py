@@ -3,11 +3,15 @@
 import curses
 
 from textwrap import wrap
-from time import time
 
 from cursewords.gui.components import UIComponent, ComponentContainer
+from cursewords.core.library import ADDED, REMOVED, UPDATED, REORDERED, RESET
 from cursewords.etc.truncate import trunc_and_pad
 
+# library changes queued while the browser isn't looking before we give up
+# on them and just start over
+MAX_PENDING_CHANGES = 256
+
 class Browser(ComponentContainer):
 
     header_left = 'Welcome to CurseWords™!'
@@ -29,7 +33,8 @@ class Browser(ComponentContainer):
 
         self.unwarranty_lines = []
 
-        self.last_drawn = time()
+        self._changes = []
+        self.cw.library.add_listener(self._library_changed)
 
         self.headers = {
             'title': 'Title',
@@ -73,10 +78,21 @@ class Browser(ComponentContainer):
         except curses.error:
             pass
 
+    def _library_changed(self, kind, key):
+
+        if len(self._changes) < MAX_PENDING_CHANGES:
+            self._changes.append((kind, key))
+        else:
+            self._changes = [(RESET, None)]
+
     def predraw(self):
 
-        if self.cw.library.last_touched > self.last_drawn:
-            self.need_redraw = True
+        if self._changes:
+            changes, self._changes = self._changes, []
+            # the headers show the sort order
+            if any(kind == RESET for kind, _ in changes):
+                self.need_redraw = True
+            self.interior.apply_changes(changes)
 
         if self.interior._old_fields != self.interior.fields:
             self.need_redraw = True
@@ -90,8 +106,6 @@ class Browser(ComponentContainer):
 
         if self.need_redraw:
 
-            self.last_drawn = time()
-
             self.win.erase()
             self.win.addstr(0, 0, self.header_left, curses.A_BOLD)
             self.win.addstr(0, self.wid - 1 - len(self.header_right), self.header_right, self.color('info','copyright'))
@@ -138,6 +152,9 @@ class BrowserInterior(UIComponent):
 
         self.lines = None
         self.need_recompute_lines = False
+
+        self._layout = None
+        self._row_cache = dict()
         self.need_recompute_columns = False
 
         self.cursor = 0
@@ -149,7 +166,9 @@ class BrowserInterior(UIComponent):
         self._column_widths = None
         self.column_ratios = [16,6,2,3,2,2,2]
         self._old_ratios = self.column_ratios
-        self.last_drawn = time()
+
+        # keys of the entries on screen
+        self._visible_keys = set()
 
         self.fields = [
             'title',
@@ -243,9 +262,6 @@ class BrowserInterior(UIComponent):
             self._old_cursor = self.cursor
             self.need_redraw = True
 
-        if self.cw.library.last_touched > self.last_drawn:
-            self.need_recompute_lines = True
-
         if self._old_ratios != self.column_ratios:
             self._old_ratios = self.column_ratios
             self.need_recompute_columns = True
@@ -271,8 +287,6 @@ class BrowserInterior(UIComponent):
         if not self.need_redraw:
             return
 
-        self.last_drawn = time()
-
         self.win.erase()
 
         y = 0
@@ -282,10 +296,15 @@ class BrowserInterior(UIComponent):
         self.first_line = self._get_first_line()
         self.old_first_line = self.first_line
 
+        self._visible_keys = {lines[i]['path'] for i in range(self.first_line, min(len(lines), self.first_line + self.hei))}
+
+        # so that scrolling a page either way finds its rows ready
+        self.cw.scheduler.defer(self, self._prefetch(max(0, self.first_line - self.hei), self.first_line + 2*self.hei))
+
         try:
 
-            for line in lines[self.first_line:]:
-                    self._draw_libitem(y, line)
+            for i in range(self.first_line, min(len(lines), self.first_line + self.hei)):
+                    self._draw_libitem(y, self._get_line(i))
                     y += 1
 
             if y < self.hei:
@@ -301,29 +320,86 @@ class BrowserInterior(UIComponent):
 
         self.need_redraw = False
 
+    def apply_changes(self, changes):
+
+        # Library changes, as (kind, key) from Library.add_listener(). The
+        # row cache already knows an updated entry by its version, so this is
+        # about what has to be redrawn: an update off screen needs nothing,
+        # anything that adds, removes or moves rows redraws what's visible.
+
+        # a filtered list is updated in place for most changes, but rebuilt
+        # after a bulk one (an import), so fetch it again
+        if self.lines is not None:
+            self.lines = self.cw.library.list_items()
+
+        for kind, key in changes:
+            if kind == RESET:
+                self.need_recompute_lines = True
+                return
+            elif kind == UPDATED:
+                if key in self._visible_keys:
+                    self.need_redraw = True
+            elif kind == REMOVED:
+                self._row_cache.pop(key, None)
+                self.need_redraw = True
+            elif kind in (ADDED, REORDERED):
+                self.need_redraw = True
+
     def _get_lines(self,force=False):
 
+        # self.lines is the library's list of entries; rows are formatted
+        # only once they're needed (_get_line) - the visible ones by draw(),
+        # a page either side in the background - and cached per entry until
+        # the entry or the column layout changes.
+
         if force or self.lines is None:
 
-            self.lines = []
+            self.lines = self.cw.library.list_items()
 
-            for i,item in enumerate(self.cw.library.list_items()):                
+            layout = (tuple(self.fields), tuple(self.column_widths))
+            if layout != self._layout:
+                self._layout = layout
+                self._row_cache = dict()
 
-                line_items = []
+            self.need_recompute_lines = False
+            self.need_redraw = True
 
-                for field, wid in zip(self.fields, self.column_widths):
-                    field_text, field_attr = self.display_functions[field](item, wid)
-                    line_items.append((trunc_and_pad(field_text, wid), field_attr))
+        return self.lines
 
-                base_attr = ['browser_item']
-                if i % 2:
-                    base_attr.append('shaded')
+    def _get_line(self, i):
 
-                self.lines.append((line_items, base_attr))
+        item = self.lines[i]
+        key = item['path']
+        version = self.cw.library.version(key)
 
-            self.need_redraw = True
+        cached = self._row_cache.get(key)
+        if cached is None or cached[0] != version:
+            cached = self._row_cache[key] = (version, self._format_row(item))
 
-        return self.lines
+        base_attr = ['browser_item']
+        if i % 2:
+            base_attr.append('shaded')
+
+        return cached[1], base_attr
+
+    def _format_row(self, item):
+
+        line_items = []
+
+        for field, wid in zip(self.fields, self.column_widths):
+            field_text, field_attr = self.display_functions[field](item, wid)
+            line_items.append((trunc_and_pad(field_text, wid), field_attr))
+
+        return line_items
+
+    def _prefetch(self, start, stop, chunk=16):
+
+        for n, i in enumerate(range(start, stop)):
+            if i >= len(self.lines):
+                return
+            self._get_line(i)
+            if n % chunk == chunk - 1:
+                yield
 
     def _format_item_status(self, item):
 
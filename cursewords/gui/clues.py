@@ -117,11 +117,14 @@ class ClueColumn(UIComponent):
 
         self.lines = []
         self.lines_hidden = []
+        self._wrapper = None
 
     def compute_lines(self):
 
+        # Clues are wrapped in order, as far down as draw() gets (see
+        # _iter_lines) and the rest in the background.
+
         label_width = len(str(self.words[-1].n) + '. ') # assuming words are properly sorted
-        indent_padding = ' '*label_width
         text_space = self.wid - label_width
         if text_space < 0:
             return
@@ -129,26 +132,53 @@ class ClueColumn(UIComponent):
         self.lines = []
         self.lines_hidden = []
 
-        for word in self.words:
+        self._wrapper = self._wrap_clues(self.words, self.lines, self.lines_hidden, label_width, text_space)
+        self.cw.scheduler.defer(self, self._wrapper)
+
+    def _wrap_clues(self, words, clue_lines, hidden_lines, label_width, text_space, chunk=8):
+
+        indent_padding = ' '*label_width
+
+        for n, word in enumerate(words):
 
             label = '{:<{}}'.format(str(word.n)+'.', label_width)
             wrapped = ['{:<{}}'.format(line,text_space) for line in wrap(word.clue, text_space)]
             lines = [(label if i == 0 else indent_padding) + line for i, line in enumerate(wrapped)]
-            self.lines.append((word,len(lines),lines))
+            clue_lines.append((word,len(lines),lines))
 
             wrapped = ['{:<{}}'.format(line,text_space) for line in wrap('░'*len(word.clue), text_space)]
             lines = [(label if i == 0 else indent_padding) + line for i, line in enumerate(wrapped)]
-            self.lines_hidden.append((word,len(lines),lines))
+            hidden_lines.append((word,len(lines),lines))
 
-    def compute_offset(self):
+            if n % chunk == chunk - 1:
+                yield
 
-        if not self.lines:
-            return 0
+    def _iter_lines(self, lines):
+
+        # lines (or lines_hidden), wrapping more clues as they're reached
+
+        i = 0
+
+        while True:
+
+            while i >= len(lines) and self._wrapper is not None:
+                try:
+                    next(self._wrapper)
+                except StopIteration:
+                    self._wrapper = None
+
+            if i >= len(lines):
+                return
+
+            yield lines[i]
+            i += 1
+
+    def compute_offset(self):
 
         v_space = self.hei - 2
 
         end_clue = 0
-        for word, n_lines, _ in self.lines:
+        for word, n_lines, _ in self._iter_lines(self.lines):
             end_clue += n_lines
             if word in self.cw.current_square().words:
                 end_clue -= 1
@@ -173,9 +203,9 @@ class ClueColumn(UIComponent):
         if not self.need_redraw:
             return
 
-        if not self.lines:
+        if not self.lines and self._wrapper is None:
             self.compute_lines()
-            if not self.lines:
+            if self._wrapper is None:
                 return
 
         offset = self.compute_offset()
@@ -197,15 +227,14 @@ class ClueColumn(UIComponent):
         y = 2
         current = 0
 
-        for word, _, clue_lines in lines:
+        for word, _, clue_lines in self._iter_lines(lines):
             keys = []
             if self.direction == self.cw.ui.solver.direction:
                 keys.append('active_column')
             if word in self.cw.current_square().words:
                 keys.append('highlighted')
-            if self.cw.current_word().refs is not None:
-                if (word.n, word.direction) in self.cw.current_word().refs:
-                    keys.append('shaded')
+            if word in self.cw.current_word().ref_words:
+                keys.append('shaded')
             for line in clue_lines:
                 if current < offset:
                     pass
@@ -27,6 +27,9 @@ class UIComponent(CWAware,ColorPaletteAware):
                 self.win = win
             else:
                 self.win = win.derwin(hei,wid,y,x)
+                # pass changes up to the parent as they're made, so
+                # refreshing the screen picks them up without a touchwin()
+                self.win.syncok(True)
 
         self.hei, self.wid, self.y, self.x = hei, wid, y, x
 
@@ -118,6 +121,13 @@ class UIComponent(CWAware,ColorPaletteAware):
 
         pass
 
+    def next_update(self):
+
+        # time() at which this needs drawing again without any input (a
+        # clock ticking over, a message expiring), or None
+
+        return None
+
 class ComponentContainer(UIComponent):
 
     def __init__(self, hei, wid, y, x, win=None):
@@ -141,6 +151,11 @@ class ComponentContainer(UIComponent):
         for component in self.components:
             component.init_keys()
 
+    def next_update(self):
+        deadlines = [component.next_update() for component in self.components if component.visible]
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        return min(deadlines) if deadlines else None
+
     def get_focus(self):
         if self.focused:
             return self
@@ -23,19 +23,31 @@ class Grid(UIComponent):
 
         self.src = None
         self.is_initialized = False
-        self.is_ready = False
 
         self.grid_hei = 0
         self.grid_wid = 0
 
-        self._grid_template_cache = dict()
-        self._cache_gen = None
+        # borders and numbers as they look with no square selected, plus the
+        # few cells around the cursor that differ from that
+        self._grid_template = None
+        self._square_items = dict()
+        self._overlay = None
+        self._overlay_cursor = None
+
+        # squares whose fill or attributes changed since the last draw; when
+        # need_redraw isn't set, only these (and the cursor's borders) get
+        # repainted
+        self._dirty = set()
+
+        # squares in the current word and in the words it references, for
+        # Square.get_attr; recomputed when the cursor or direction changes
+        self.current_coords = None
+        self.highlighted = frozenset()
+        self.cross_referenced = frozenset()
 
         self.old_cursor = None
         self.old_direction = None
 
-        self.build_prog = 0
-
     def init_keys(self):
 
         #self.bind_key(' ', self.cw.notify, 'foo')
@@ -48,6 +60,8 @@ class Grid(UIComponent):
 
         self.bind_key('\t', self.cw.next_word)
         self.bind_key(curses.KEY_BTAB, self.cw.prev_word)
+        self.bind_key(14, self.cw.next_incomplete_word)
+        self.bind_key(16, self.cw.prev_incomplete_word)
 
         self.bind_key(curses.KEY_BACKSPACE, self.cw.clear_square)
         self.bind_key(curses.KEY_DC, self.cw.clear_square, False)
@@ -69,7 +83,6 @@ class Grid(UIComponent):
 
     def open(self,src):
 
-        self.cw.ui.block_input = True
         self.src = src
         self.visible = True
 
@@ -84,11 +97,17 @@ class Grid(UIComponent):
         self.focused = False
         self.old_cursor = None
         self.old_direction = None
+        self.current_coords = None
+        self.highlighted = frozenset()
+        self.cross_referenced = frozenset()
         self.grid_hei = 0
         self.grid_wid = 0
-        self._grid_template_cache = dict()
+        self._grid_template = None
+        self._square_items = dict()
+        self._overlay = None
+        self._overlay_cursor = None
+        self._dirty = set()
         self.is_initialized = False
-        self.is_ready = False
 
     def build(self):
 
@@ -102,12 +121,15 @@ class Grid(UIComponent):
         # placeholder, make fancy later
         self.old_cursor = self.cw.ui.solver.cursor
         self.old_direction = self.cw.ui.solver.direction
+        self._update_highlights()
 
         Square.link_grid(self)
 
-        self._cache_gen = self.make_cache()
-        self.cw.ui.win.nodelay(1)
-        curses.cbreak()
+        # no square is ever at (-1,-1), so nothing gets drawn as selected
+        self._grid_template = self._make_grid_template(cursor=Coord(-1,-1))
+        self._overlay = None
+        self._overlay_cursor = None
+        self._dirty = set()
         self.is_initialized = True
 
     def fit_to_source(self):
@@ -118,37 +140,75 @@ class Grid(UIComponent):
         else:
             UIComponent.resize(self, 1, 1, 0, 0)
 
-    def make_cache(self):
-
-        i = 0
-
-        for y in range(self.grid_hei):
-            for x in range(self.grid_wid):
-                self._grid_template_cache[(y,x)] = self._make_grid_template(cursor=Coord(y,x))
-                yield i
-                i += 1
-
-
     def predraw(self):
 
         # if initialized, do additional checks
         if self.is_initialized:
             if self.cw.ui.solver.cursor != self.old_cursor or self.cw.ui.solver.direction != self.old_direction:
+                # the old and new words (and whatever they reference) change
+                # highlighting, everything else stays as it is
+                self._mark_word_dirty(self.old_cursor, self.old_direction)
                 self.old_cursor = self.cw.ui.solver.cursor
                 self.old_direction = self.cw.ui.solver.direction
-                self.need_redraw = True
+                self._mark_word_dirty(self.old_cursor, self.old_direction)
+                self._update_highlights()
 
         # redraw if visibility changed, erase if invisible
         UIComponent.predraw(self)
 
-    def draw(self):
+    def mark_dirty(self, coords):
 
-        if not self.need_redraw:
+        self._dirty.add(coords)
+
+    def _mark_word_dirty(self, cursor, direction):
+
+        if cursor is None or direction is None:
             return
 
+        self._dirty.add(cursor)
+
+        word = self.src.squares[cursor.y][cursor.x].words[direction]
+        if word is None:
+            return
+
+        self._dirty.update(sq.coords for sq in word)
+        self._dirty.update(word.ref_coords)
+
+    def _update_highlights(self):
+
+        cursor, direction = self.old_cursor, self.old_direction
+
+        if cursor is None or direction is None:
+            word = None
+        else:
+            word = self.src.squares[cursor.y][cursor.x].words[direction]
+
+        self.current_coords = cursor
+
+        if word is None:
+            self.highlighted = frozenset()
+            self.cross_referenced = frozenset()
+        else:
+            self.highlighted = frozenset(sq.coords for sq in word)
+            self.cross_referenced = word.ref_coords
+
+    def draw(self):
+
         if self.src is None or not self.is_initialized:
             return
 
+        if self.need_redraw:
+            self._draw_full()
+        elif self._dirty or self.cw.ui.solver.cursor != self._overlay_cursor:
+            # the pause message sits on top of the grid, so don't draw
+            # squares through it
+            if self.cw.ui.solver.paused:
+                self._draw_full()
+            else:
+                self._draw_dirty()
+
+    def _draw_full(self):
+
         win = self.win
 
         bkgd_keys = ['grid_lines']
@@ -158,45 +218,70 @@ class Grid(UIComponent):
 
         win.erase()
 
-        if not self.is_ready:
-            try:
-                #build_progress = 0
-                build_progress = next(self._cache_gen)
-                build_pct = (build_progress * 100) // (self.grid_hei * self.grid_wid)
-                n_dots = (build_progress // 20) % 4
-                message_ellipsis = '{:<3}'.format('.'*n_dots)
-                self.win.addstr(1,3,'Loading{} {:>3}%'.format(message_ellipsis, build_pct), self.color('normal'))
-                return
-            except StopIteration:
-                self.is_ready = True
-                self.cw.ui.block_input = False
-                self.cw.ui.win.nodelay(0)
-                curses.halfdelay(5)
-
-        template = self._grid_template_cache.get(self.cw.ui.solver.cursor, self._make_grid_template(cursor=self.cw.ui.solver.cursor))
+        cursor = self.cw.ui.solver.cursor
+        if self._overlay is None or cursor != self._overlay_cursor:
+            self._overlay = self._make_overlay(cursor)
+            self._overlay_cursor = cursor
 
         for y in range(self.margin.y, self.hei - self.margin.y):
 
-            line_template = template[y - self.margin.y]
+            line_template = self._grid_template[y - self.margin.y]
 
             win.move(y, self.margin.x)
 
             for item in line_template:
 
                 if isinstance(item,dict):
-                    text = item['fmt'].format(item['fill_func']())
-                    if len(text) > 3:
-                        text = text[0:2] + b'\xE2\x80\xA6'.decode('utf-8')
-                    attr = item['attr_func']()
-                    item = (text, attr)
+                    item = self._fill_item(item)
 
                 win.addstr(*item)
 
+        self._draw_overlay(self._overlay)
+
         if self.cw.ui.solver.paused:
             self._draw_paused_message()
 
+        self._dirty.clear()
         self.need_redraw = False
 
+    def _draw_dirty(self):
+
+        # no erase() and no bkgd() here - either one makes curses resend the
+        # whole window
+
+        cursor = self.cw.ui.solver.cursor
+
+        if cursor != self._overlay_cursor:
+            # put the old cursor's borders back the way the template has
+            # them, then draw the new ones over that
+            if self._overlay_cursor is not None:
+                self._draw_overlay(self._make_overlay(self._overlay_cursor, cursor=Coord(-1,-1)))
+            self._overlay = self._make_overlay(cursor)
+            self._overlay_cursor = cursor
+            self._draw_overlay(self._overlay)
+
+        for coords in self._dirty:
+            y, x = self._sq_yx_to_winyx(y=coords.y, x=coords.x, yshift=1, xshift=1)
+            self.win.addstr(y, x, *self._fill_item(self._square_items[coords]))
+
+        self._dirty.clear()
+
+    def _draw_overlay(self, overlay):
+
+        for y, x, items in overlay:
+            self.win.move(y, x)
+            for item in items:
+                self.win.addstr(*item)
+
+    def _fill_item(self, item):
+
+        text = item['fmt'].format(item['fill_func']())
+        if len(text) > 3:
+            text = text[0:2] + b'\xE2\x80\xA6'.decode('utf-8')
+        attr = item['attr_func']()
+
+        return (text, attr)
+
     def _draw_paused_message(self):
 
             start_x = self.margin.x + 2
@@ -267,12 +352,10 @@ class Grid(UIComponent):
 
     def _make_grid_template(self, cursor=None):
 
-        if self.src.squares[cursor.y][cursor.x].is_block:
-            return None
-
         sq_inner_size, sq_border_size = Square.inner_size, Square.border_size
 
         lines=[]
+        self._square_items = dict()
 
         for y in range(self.margin.y, self.hei-self.margin.y):
 
@@ -297,13 +380,15 @@ class Grid(UIComponent):
                         # pre-computed, so we're just including a formatter and
                         # links to the current square's methods
                         sq = self.src.squares[sq_y][sq_x]
-                        line += [ {
+                        item = {
                             'fmt': '{{:^{}}}'.format(sq_inner_size.x),
                             'fill_func': partial(self._draw_sq, sq),
                             'attr_func': partial(self._get_sq_attr, sq)
                            # 'fill_func': sq.get_fill,
                            # 'attr_func': sq.get_attr
-                        } ]
+                        }
+                        line += [item]
+                        self._square_items[sq.coords] = item
 
                     else:
                         continue
@@ -322,17 +407,7 @@ class Grid(UIComponent):
 
                     elif rel_x == 1 and sq_x is not None: # sanity check -- sq_x *should* never be None here
 
-                        border_ch = self._get_border_ch(y, x, cursor=cursor, direction='h')
-
-                        if sq_y is not None and self.src.squares[sq_y][sq_x].n:
-                            n = str(self.src.squares[sq_y][sq_x].n)
-                            if sq_y > 0:
-                                attr = curses.A_REVERSE if self.src.squares[sq_y - 1][sq_x].is_block else 0
-                            else:
-                                attr = 0
-                            line += [(n,attr), (border_ch * (sq_inner_size.x-len(n)),)]
-                        else:
-                            line += [(border_ch * sq_inner_size.x,)]
+                        line += self._get_h_border(y, x, cursor=cursor)
 
                     else:
                         continue
@@ -341,6 +416,59 @@ class Grid(UIComponent):
 
         return lines
 
+    def _make_overlay(self, coords, cursor=None):
+
+        # Only the selected square's own borders and corners look any
+        # different from the static template, so that's all that has to be
+        # recomputed when the cursor moves: (win y, win x, items) runs drawn
+        # on top of the template. Passing a different cursor gives the
+        # borders of the square at coords as they'd look with that cursor.
+
+        if coords is None:
+            return []
+
+        if cursor is None:
+            cursor = coords
+
+        sq_inner_size, sq_border_size = Square.inner_size, Square.border_size
+        sq_total = sq_inner_size + sq_border_size
+
+        top, left = self._sq_yx_to_winyx(y=coords.y, x=coords.x)
+        bottom, right = top + sq_total.y, left + sq_total.x
+
+        overlay = []
+
+        for y in (top, bottom):
+            overlay.append((y, left, [(self._get_inter_ch2(y, left, cursor=cursor),)]))
+            overlay.append((y, left + 1, self._get_h_border(y, left + 1, cursor=cursor)))
+            overlay.append((y, right, [(self._get_inter_ch2(y, right, cursor=cursor),)]))
+
+        for y in range(top + 1, bottom):
+            for x in (left, right):
+                overlay.append((y, x, [(self._get_border_ch(y, x, cursor=cursor, direction='v'),)]))
+
+        return overlay
+
+    def _get_h_border(self, y, x, cursor=None):
+
+        # horizontal border along the top of a square, with its clue number
+        # (if any) written into it
+
+        sq_inner_size = Square.inner_size
+        sq_y, sq_x = self._winyx_to_sq_yx(y=y, x=x)
+
+        border_ch = self._get_border_ch(y, x, cursor=cursor, direction='h')
+
+        if sq_y is not None and self.src.squares[sq_y][sq_x].n:
+            n = str(self.src.squares[sq_y][sq_x].n)
+            if sq_y > 0:
+                attr = curses.A_REVERSE if self.src.squares[sq_y - 1][sq_x].is_block else 0
+            else:
+                attr = 0
+            return [(n,attr), (border_ch * (sq_inner_size.x-len(n)),)]
+        else:
+            return [(border_ch * sq_inner_size.x,)]
+
     def _draw_sq(self, sq):
 
         if self.cw.ui.solver.paused:
@@ -67,7 +67,6 @@ class Solver(ComponentContainer):
     def close(self):
 
         self.cw.library.update_status(self.src)
-        self.cw.library.touch()
         self.visible = False
         self.focused = False
         self.finished = False
@@ -88,6 +87,7 @@ class Solver(ComponentContainer):
         self.src.timer.resume()
         if self.cw.library[self.src]['start_date'] is None:
             self.cw.library[self.src]['start_date'] = datetime.datetime.now().isoformat(sep=' ')[:19]
+            self.cw.library.touch(self.src.path)
         self.show()
 
     def pause(self):
@@ -107,6 +107,7 @@ class Solver(ComponentContainer):
         self.cw.library.update_status(self.src)
         if self.cw.library[self.src]['completion_date'] is None:
             self.cw.library[self.src]['completion_date'] = datetime.datetime.now().isoformat(sep=' ')[:19]
+            self.cw.library.touch(self.src.path)
         
         if self.paused:
             self.show()
@@ -117,7 +118,7 @@ class Solver(ComponentContainer):
 
         if self.src is not None:
 
-            if self.src.complete or (self.src.filled == self.src.fillable and self.cw.check_silent()):
+            if self.src.complete or self.src.is_solved():
                 if not self.finished:
                     self.finish_puzzle()
 
@@ -133,6 +134,11 @@ class Solver(ComponentContainer):
         self._draw_status()
         ComponentContainer.draw(self)
 
+    def next_update(self):
+        if self.src is None or self.paused:
+            return None
+        return self.src.timer.next_tick()
+
     def _draw_status(self):
         time_str = self.src.timer.fmt_time()
         time_str = '{:>{}}'.format(time_str, self.clues.wid)
@@ -38,6 +38,11 @@ class StatusBar(UIComponent):
 
             self.need_redraw = False
 
+    def next_update(self):
+        if self.message:
+            return self.message.expires()
+        return None
+
     def notify(self, text, color=[], lifetime=5):
         self.message = Message(text, color, lifetime)
 
@@ -59,6 +64,9 @@ class Message(ColorPaletteAware):
     def kill(self): # :(
         self._kill = True
 
+    def expires(self):
+        return self.born + self.lifetime
+
     def is_alive(self):
         if self._kill:
             return False
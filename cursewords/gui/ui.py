@@ -29,8 +29,6 @@ class UI(ComponentContainer):
         self.visible = True
         self.need_redraw = True
 
-        self.block_input = False
-
     def initialize(self):
 
         self.browser = Browser(1, 1, 0, 0, win=self.win)
@@ -99,22 +97,32 @@ class UI(ComponentContainer):
 
     def handle_input(self):
 
-        key = self.win.getch()
-
-        if key == -1:
-            return
-
-        if not self.block_input:
-            if key == curses.KEY_MOUSE:
-                self.handle_mouse()
-            elif key == curses.KEY_RESIZE:
-                self.resize()
-            else:
-                focus = self.get_focus()
-                if focus:
-                    focus.key_bindings[key]()
-        curses.flushinp()
-        return
+        # Dispatches every key that's waiting, in order, so a fast typist or
+        # a pasted answer doesn't lose keystrokes; the main loop then redraws
+        # once for the whole batch. The window is in nodelay mode, so getch()
+        # returns -1 once the queue is empty.
+
+        while True:
+
+            key = self.win.getch()
+
+            if key == -1:
+                return
+
+            self.handle_key(key)
+
+    def handle_key(self, key):
+
+        if key == curses.KEY_MOUSE:
+            self.handle_mouse()
+        elif key == curses.KEY_RESIZE:
+            self.resize()
+        else:
+            # looked up per key: a key can move the focus (e.g. ':' opens
+            # the console) and the rest of the batch should follow it
+            focus = self.get_focus()
+            if focus:
+                focus.key_bindings[key]()
 
     def handle_mouse(self):
 
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 
 import curses
+import gc
 import sys
 import os
 import signal
 
 from cursewords.core.cw import CurseWords
 from cursewords.core.aware import CWAware
+from cursewords.core.library import LIB_BACKENDS, LIB_BACKEND
 
 def handleSIGHUP(signalNumber, frame):
     if cw.ui.console.history:
@@ -15,26 +17,33 @@ def handleSIGHUP(signalNumber, frame):
         cw.library.save_lib()
     sys.exit(1)
 
-def run(win, import_paths, import_source):
+def run(win, import_paths, import_source, library_backend):
     
     MOUSEMASK = curses.ALL_MOUSE_EVENTS | curses.REPORT_MOUSE_POSITION
     curses.mousemask(MOUSEMASK)
     curses.mouseinterval(0)
     curses.curs_set(0)
-    curses.halfdelay(5)
 
     cw = CurseWords(win=win)
     CWAware.cw_set(cw)
-    cw.initialize()
+    cw.initialize(library_backend=library_backend)
     cw.ui.initialize()
 
+    # Startup has just built everything that stays around until exit - the
+    # loaded library with its sort keys and filter index, the UI. Freezing
+    # it keeps the cyclic GC from walking all of that on every full
+    # collection, which with tens of thousands of puzzles stalls the main
+    # loop for 100ms or more. Done once, here, since it affects the whole
+    # process.
+    gc.freeze()
+
     signal.signal(signal.SIGHUP, handleSIGHUP)
 
     if import_paths is not None:
         imported = 0
         err_list = []
-        for path in import_paths:
-            ret = cw.library.import_file(path, source=import_source)
+        results = cw.library.import_many(import_paths, source=import_source)
+        for path, ret in zip(import_paths, results):
             if ret == 0:
                 imported += 1
             elif ret == 1:
@@ -75,20 +84,29 @@ def main(args):
 
     import_paths = None
     import_source = None
+    library_backend = LIB_BACKEND
 
     args = args[1:]
 
-    if args:
+    while args and args[0] in ('--source', '--backend'):
+        try:
+            value = args[1]
+        except IndexError:
+            sys.exit(1)
         if args[0] == '--source':
-            try:
-                import_source = args[1]
-                args = args[2:]
-            except IndexError:
-                sys.exit(1)
+            import_source = value
+        else:
+            library_backend = value
+        args = args[2:]
+
+    if library_backend not in LIB_BACKENDS:
+        sys.exit('Unknown library backend: {} (expected one of: {})'.format(library_backend, ', '.join(LIB_BACKENDS)))
+
+    if args:
         import_paths = [os.path.expanduser(arg) for arg in args]
 
     os.environ.setdefault('ESCDELAY', '0')
-    exit = curses.wrapper(run, import_paths, import_source)
+    exit = curses.wrapper(run, import_paths, import_source, library_backend)
     os.system('clear')
     return exit
 